@@ -3,21 +3,47 @@ PhishGuard Flask API
 Main backend server for ML predictions
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import hmac
+import os
+import sys
 import time
 import logging
+import signal
+import threading
 from typing import Dict, Any
 
-# Import our modules
-from utils.model_loader import ModelLoader
-from utils.config import get_config
-from feature_extraction.url_features import URLFeatureExtractor
-from feature_extraction.email_features import EmailFeatureExtractor
-from schemas.request_schemas import (
-    URLPredictRequest, EmailPredictRequest,
-    HealthResponse, ErrorResponse
-)
+# Time every startup stage from here on (reported in the logs)
+from utils.startup import StartupTimer
+startup_timer = StartupTimer()
+
+with startup_timer.stage('import flask'):
+    from flask import Flask, request, jsonify, g
+    from flask_cors import CORS
+    from werkzeug.exceptions import RequestEntityTooLarge
+
+with startup_timer.stage('import numpy'):
+    import numpy as np
+
+with startup_timer.stage('import modules'):
+    # Import our modules (model loading pulls in joblib/sklearn lazily)
+    from utils.model_loader import ModelLoader
+    from utils.model_watcher import ModelWatcher
+    from utils.metrics import MetricsRegistry, NULL_TIMER
+    from utils.domain_index import DomainIndex, build_domain_index
+    from utils.single_flight import SingleFlight
+    from utils.load_shedder import LoadShedder, resolve_budget_ms
+    from utils.heuristics import heuristic_url_score, heuristic_email_score
+    from utils.raw_email import parse_message, MessageTooLarge, READ_SIZE
+    from utils.config import get_config, ProductionConfig
+    from utils.prediction_cache import PredictionCache, canonicalize_url
+    from utils.shared_cache import SharedPredictionCache
+    from utils.scoring import get_risk_level, describe_score
+    from feature_extraction.url_features import URLFeatureExtractor
+    from feature_extraction.email_features import EmailFeatureExtractor
+    from schemas.request_schemas import (
+        URLPredictRequest, URLBatchPredictRequest, URLBatchItem, EmailPredictRequest,
+        HealthResponse, ErrorResponse
+    )
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -29,48 +55,417 @@ CORS(app)  # Enable CORS for extension
 
 # Load config
 config = get_config()
+# Werkzeug stops reading bodies past this (chunked uploads included)
+app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
 
 # Initialize models and extractors
 url_model = None
 email_model = None
-url_extractor = URLFeatureExtractor()
-email_extractor = EmailFeatureExtractor()
+url_extractor = URLFeatureExtractor(max_scan_chars=config.MAX_SCAN_CHARS)
+email_extractor = EmailFeatureExtractor(max_scan_chars=config.MAX_SCAN_CHARS)
+
+# URL predictions keyed on (canonical URL, page context features)
+# (in shared memory for pre-forked workers, so all of them see each hit)
+prediction_cache_class = SharedPredictionCache if config.SHARED_PREDICTION_CACHE else PredictionCache
+url_prediction_cache = prediction_cache_class(
+    max_size=config.PREDICTION_CACHE_SIZE,
+    ttl=config.PREDICTION_CACHE_TTL
+)
+
+# Set by serve.py in forked workers: models and the domain index belong to
+# the master, which reloads them (and re-forks) on SIGHUP
+prefork_master_pid = None
+
+# Blocklist/allowlist consulted before the URL model (filled by load_models)
+domain_index = DomainIndex()
+
+# Coalesce concurrent identical predictions into one computation
+url_flights = SingleFlight()
+email_flights = SingleFlight()
+
+# Under overload, answer with the background.js heuristic instead of queueing
+# (asgi.py replaces them with shedders sized for its micro-batches)
+url_shedder = LoadShedder(config.LOAD_SHED_MAX_QUEUE_DEPTH)
+email_shedder = LoadShedder(config.LOAD_SHED_MAX_QUEUE_DEPTH)
+
+# Micro-batch schedulers by model type, registered by asgi.py
+micro_batchers = {}
+
+# Request counts and per-stage latency histograms for /metrics
+metrics = MetricsRegistry()
+
+# Per-thread (1, n) float32 feature rows, reused across requests
+_feature_buffers = threading.local()
+
+def get_feature_row(model_type):
+    """Return this thread's preallocated feature row for 'url' or 'email'"""
+    row = getattr(_feature_buffers, model_type, None)
+    if row is None:
+        extractor = url_extractor if model_type == 'url' else email_extractor
+        row = np.empty((1, extractor.NUM_FEATURES), dtype=np.float32)
+        setattr(_feature_buffers, model_type, row)
+    return row
+
+# Set once load_models() has run (successfully or not)
+models_ready = threading.Event()
+_models_lock = threading.Lock()
+
+def _load_model(model_type):
+    """Load one model and check it was trained on our extractor's features"""
+    loader = ModelLoader(model_type)
+    scorer = loader.load_scorer()
+    extractor = url_extractor if model_type == 'url' else email_extractor
+    loader.validate(extractor.get_feature_names())
+    return scorer
+
+def load_domain_index(extra_feed=None, kind='block'):
+    """Build the domain index from the configured feeds (plus extra_feed)"""
+    block_feeds = list(config.BLOCKLIST_FEEDS)
+    allow_feeds = list(config.ALLOWLIST_FEEDS)
+    if extra_feed:
+        (allow_feeds if kind == 'allow' else block_feeds).append(extra_feed)
+    
+    return build_domain_index(
+        block_feeds, allow_feeds,
+        bloom_threshold=config.BLOOM_THRESHOLD,
+        bloom_error_rate=config.BLOOM_ERROR_RATE
+    )
 
 def load_models():
-    """Load both ML models at startup"""
-    global url_model, email_model
+    """Load both ML models and the domain index"""
+    global url_model, email_model, domain_index
+    
+    with startup_timer.stage('load domain index'):
+        domain_index = load_domain_index()
     
     try:
         logger.info("Loading URL model...")
-        url_loader = ModelLoader('url')
-        url_model = url_loader.load_model()
-        logger.info("✅ URL model loaded successfully")
+        with startup_timer.stage('load url model'):
+            url_model = _load_model('url')
+        logger.info(f"✅ URL model loaded successfully ({url_model.engine} engine)")
     except Exception as e:
         logger.error(f"❌ Failed to load URL model: {e}")
         url_model = None
     
     try:
         logger.info("Loading Email model...")
-        email_loader = ModelLoader('email')
-        email_model = email_loader.load_model()
-        logger.info("✅ Email model loaded successfully")
+        with startup_timer.stage('load email model'):
+            email_model = _load_model('email')
+        logger.info(f"✅ Email model loaded successfully ({email_model.engine} engine)")
     except Exception as e:
         logger.error(f"❌ Failed to load Email model: {e}")
         email_model = None
+    
+    # Cached predictions belong to the previous model
+    url_prediction_cache.clear()
+    
+    if not models_ready.is_set():
+        models_ready.set()
+        startup_timer.report(logger, "Models ready", config.STARTUP_BUDGET_MS)
+
+_reload_lock = threading.Lock()
+
+def reload_model(model_type):
+    """
+    Load a new model next to the serving one and swap it in atomically
+    In-flight requests keep the model they started with; if loading or
+    validation fails the current model stays in place and the error is raised
+    """
+    global url_model, email_model
+    
+    with _reload_lock:
+        scorer = _load_model(model_type)
+        if model_type == 'url':
+            url_model = scorer
+            # Clear after the swap so no old-model result survives
+            url_prediction_cache.clear()
+        else:
+            email_model = scorer
+        
+        if model_watcher is not None:
+            model_watcher.mark_loaded(model_type)
+    
+    logger.info(f"✅ {model_type.upper()} model reloaded ({scorer.engine} engine)")
+    return scorer
+
+def ensure_models_loaded():
+    """
+    Make sure load_models() has run before serving a prediction
+    In lazy mode the first caller loads; in background mode callers
+    wait up to MODEL_LOAD_TIMEOUT for the loader thread
+    """
+    if models_ready.is_set():
+        return True
+    
+    if config.MODEL_LOAD_MODE == 'lazy':
+        with _models_lock:
+            if not models_ready.is_set():
+                load_models()
+        return True
+    
+    return models_ready.wait(config.MODEL_LOAD_TIMEOUT)
+
+def index_result(match):
+    """Prediction result for a URL answered by the domain index"""
+    is_blocked = match['source'] == 'blocklist'
+    return {
+        **describe_score(1.0 if is_blocked else 0.0, 1 if is_blocked else 0),
+        'source': match['source'],
+        'index_match': match['match']
+    }
+
+def request_budget_ms(req):
+    """Latency budget of the current request (None: no budget)"""
+    return resolve_budget_ms(
+        req.latency_budget_ms,
+        request.headers.get('X-Latency-Budget-Ms'),
+        config.DEFAULT_LATENCY_BUDGET_MS
+    )
+
+def degraded_result(heuristic_score, reason):
+    """Prediction result for a request shed to the heuristic score"""
+    probability = heuristic_score / 100
+    return {
+        **describe_score(probability, 1 if probability >= 0.5 else 0),
+        'source': 'heuristic',
+        'degraded': True,
+        'degraded_reason': reason
+    }
+
+def score_urls(model, items, cache_generation=None, return_features=False, timer=NULL_TIMER):
+    """
+    Score many URLs together
+    items: objects with url, page_text, links_count (and optionally
+    return_features); cache hits are served directly and all misses go
+    through one model call on a stacked feature matrix
+    Returns one result dict per item
+    """
+    keys = []
+    contexts = []
+    cached_results = []
+    wants_features = []
+    index_matches = {}
+    for i, item in enumerate(items):
+        canonical_url = canonicalize_url(item.url)
+        match = domain_index.lookup(canonical_url)
+        if match is not None:
+            index_matches[i] = match
+        page_context = url_extractor.page_context_features(item.page_text, item.links_count)
+        keys.append((canonical_url,) + page_context)
+        contexts.append(page_context)
+        cached_results.append(None if match else url_prediction_cache.get(keys[-1]))
+        wants_features.append(return_features or getattr(item, 'return_features', False))
+    timer.mark('cache')
+    
+    # Rows to extract: every cache miss plus anything returning features
+    is_miss = [
+        cached_results[i] is None and i not in index_matches
+        for i in range(len(items))
+    ]
+    misses = [i for i in range(len(items)) if is_miss[i]]
+    pending = [i for i in range(len(items)) if is_miss[i] or wants_features[i]]
+    features = np.empty((len(pending), url_extractor.NUM_FEATURES), dtype=np.float32)
+    rows = {}
+    for row, i in enumerate(pending):
+        url_extractor.extract_features_into(
+            features[row], items[i].url, page_context=contexts[i]
+        )
+        rows[i] = row
+    timer.mark('extract')
+    
+    # One model call for every cache miss
+    scored = {}
+    if misses:
+        miss_features = features if len(misses) == len(pending) else features[[rows[i] for i in misses]]
+        probabilities, predictions = model.score(miss_features)
+        for j, i in enumerate(misses):
+            value = (float(probabilities[j]), int(predictions[j]))
+            url_prediction_cache.set(keys[i], value, cache_generation)
+            scored[i] = value
+    timer.mark('inference')
+    
+    results = []
+    for i, item in enumerate(items):
+        if i in index_matches:
+            result = {'url': item.url, **index_result(index_matches[i]), 'cached': False}
+        else:
+            cached = cached_results[i]
+            probability, prediction = cached if cached is not None else scored[i]
+            result = {
+                'url': item.url,
+                **describe_score(probability, prediction),
+                'cached': cached is not None,
+                'source': 'model'
+            }
+        if wants_features[i]:
+            result['features'] = url_extractor.features_to_dict(features[rows[i]])
+        results.append(result)
+    return results
+
+def score_email_links(links_per_email):
+    """
+    URL model risk of the links of one or more emails
+    Every distinct link (by canonical URL) across all the emails goes
+    through score_urls once, so the whole lot is one model call and
+    cached / indexed links are not scored again (at most MAX_BATCH_SIZE
+    distinct links per call)
+    Returns per email: {'results', 'count', 'max_risk_score',
+    'mean_risk_score'}, or None for every email if the URL model is not loaded
+    """
+    cache_generation = url_prediction_cache.generation
+    model = url_model
+    if model is None:
+        return [None] * len(links_per_email)
+    
+    # Canonical URL of every link; the first spelling of each is scored
+    keys_per_email = [[canonicalize_url(link) for link in links or ()] for links in links_per_email]
+    canonical = {}
+    for links, keys in zip(links_per_email, keys_per_email):
+        for link, key in zip(links or (), keys):
+            if key not in canonical and len(canonical) < config.MAX_BATCH_SIZE:
+                canonical[key] = link
+    results = dict(zip(canonical, score_urls(
+        model, [URLBatchItem(url=link) for link in canonical.values()], cache_generation
+    ))) if canonical else {}
+    
+    summaries = []
+    for keys in keys_per_email:
+        link_results = [results[key] for key in dict.fromkeys(keys) if key in results]
+        risks = [result['risk_score'] for result in link_results]
+        summaries.append({
+            'results': link_results,
+            'count': len(link_results),
+            'max_risk_score': max(risks, default=0.0),
+            'mean_risk_score': sum(risks) / len(risks) if risks else 0.0
+        })
+    return summaries
+
+def score_emails(model, items, timer=NULL_TIMER):
+    """
+    Score many emails with one model call
+    items: objects with subject, body, links, return_features and score_links
+    Returns one result dict per item
+    """
+    features = np.empty((len(items), email_extractor.NUM_FEATURES), dtype=np.float32)
+    # Exact values of the rows returning features (the float32 row rounds ratios)
+    exact_features = {}
+    for row, item in enumerate(items):
+        values = email_extractor.compute_features(item.subject, item.body, item.links)
+        features[row] = values
+        if item.return_features:
+            exact_features[row] = values
+    timer.mark('extract')
+    
+    probabilities, predictions = model.score(features)
+    timer.mark('inference')
+    
+    # Links of every email asking for them, scored in one URL model call
+    link_risks = [None] * len(items)
+    if any(item.score_links for item in items):
+        link_risks = score_email_links([item.links if item.score_links else [] for item in items])
+        timer.mark('links')
+    
+    results = []
+    for i, item in enumerate(items):
+        result = {
+            'subject': item.subject[:50] + '...' if len(item.subject) > 50 else item.subject,
+            **describe_score(probabilities[i], predictions[i])
+        }
+        if item.score_links:
+            result['link_risk'] = link_risks[i]
+        if item.return_features:
+            result['features'] = email_extractor.features_to_dict(exact_features[i])
+        results.append(result)
+    return results
+
+model_watcher = None
+
+def start_model_watcher():
+    """Reload models when their files change (MODEL_WATCH_INTERVAL > 0)"""
+    global model_watcher
+    
+    if config.MODEL_WATCH_INTERVAL <= 0:
+        return None
+    
+    model_watcher = ModelWatcher({
+        'url': [config.URL_MODEL_PATH, config.URL_METADATA_PATH, config.URL_ARTIFACT_PATH],
+        'email': [config.EMAIL_MODEL_PATH, config.EMAIL_METADATA_PATH, config.EMAIL_ARTIFACT_PATH]
+    }, reload_model, interval=config.MODEL_WATCH_INTERVAL)
+    return model_watcher.start()
+
+def start_model_loading():
+    """Load models according to MODEL_LOAD_MODE (eager, background or lazy)"""
+    mode = config.MODEL_LOAD_MODE
+    if mode == 'background':
+        logger.info("Loading models in the background...")
+        threading.Thread(target=load_models, name='model-loader', daemon=True).start()
+    elif mode == 'lazy':
+        logger.info("Models will be loaded on the first prediction request")
+    else:
+        load_models()
+
+@app.before_request
+def start_request_timer():
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.timer = metrics.timer(endpoint)
+
+def too_large_response():
+    return jsonify(ErrorResponse(
+        error="Request too large",
+        detail=f"At most {config.MAX_CONTENT_LENGTH} bytes are accepted per request.",
+        status_code=413
+    ).dict()), 413
+
+@app.before_request
+def reject_oversized_request():
+    """
+    413 from the declared length, before any of the body is read; JSON
+    bodies without one (chunked) are read here up to the cap
+    """
+    if request.content_length is not None:
+        if request.content_length > config.MAX_CONTENT_LENGTH:
+            return too_large_response()
+    elif request.is_json and request.max_content_length is not None:
+        # Werkzeug ends a chunked body at the cap without an error, so
+        # get_json() would see truncated JSON; a byte left past it means
+        # the body was too large (get_data caches the body for get_json)
+        if (len(request.get_data()) >= request.max_content_length
+                and request.environ['wsgi.input'].read(1)):
+            return too_large_response()
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """413 for bodies without a declared length (chunked), cut off mid-read"""
+    return too_large_response()
+
+@app.after_request
+def record_request_metrics(response):
+    timer = g.pop('timer', None)
+    if timer is not None:
+        timer.finish(response.status_code)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+    Returns 503 while models are still loading in the background so
+    load balancers only route traffic to ready workers
+    """
+    # Lazy mode is ready to serve right away; the first request loads
+    ready = models_ready.is_set() or config.MODEL_LOAD_MODE == 'lazy'
     response = HealthResponse(
-        status='healthy',
+        status='healthy' if ready else 'loading',
         version='1.0.0',
+        ready=ready,
         models_loaded={
             'url': url_model is not None,
             'email': email_model is not None
         },
+        startup=startup_timer.as_dict(),
         timestamp=time.strftime('%Y-%m-%d %H:%M:%S')
     )
-    return jsonify(response.dict()), 200
+    return jsonify(response.dict()), 200 if ready else 503
 
 @app.route('/predict/url', methods=['POST'])
 def predict_url():
@@ -79,51 +474,118 @@ def predict_url():
     Expected JSON: {
         "url": "https://example.com",
         "page_text": "optional page text",
-        "links_count": 0
+        "links_count": 0,
+        "latency_budget_ms": 50  (optional, or X-Latency-Budget-Ms header)
     }
+    Past the budget or under overload the answer is the heuristic
+    score, marked "degraded": true
     """
     start_time = time.time()
     
     try:
         # Parse request
+        timer = g.timer
         data = request.get_json()
+        timer.mark('parse')
         req = URLPredictRequest(**data)
+        timer.mark('validate')
         
-        # Check if model is loaded
-        if url_model is None:
+        # Check if model is loaded; read the cache generation before the
+        # model so a concurrent reload can't leave old results in the cache
+        ensure_models_loaded()
+        cache_generation = url_prediction_cache.generation
+        model = url_model
+        timer.skip()
+        
+        # Known-bad / known-good URLs are answered without the model
+        canonical_url = canonicalize_url(req.url)
+        match = domain_index.lookup(canonical_url)
+        timer.mark('index')
+        if match is not None:
+            response = {
+                'url': req.url,
+                **index_result(match),
+                'cached': False,
+                'processing_time_ms': (time.time() - start_time) * 1000
+            }
+            if req.return_features:
+                response['features'] = url_extractor.extract_features(
+                    req.url, req.page_text, req.links_count
+                )
+                response['feature_names'] = url_extractor.get_feature_names()
+            
+            logger.info(f"URL prediction: {req.url[:50]}... -> {response['risk_level']} ({match['source']})")
+            body = jsonify(response)
+            timer.mark('serialize')
+            return body, 200
+        
+        if model is None:
             return jsonify(ErrorResponse(
                 error="Model not loaded",
                 detail="URL model is not available. Please train the model first.",
                 status_code=503
             ).dict()), 503
         
-        # Extract features (matching your frontend)
-        features = url_extractor.extract_features_array(
-            req.url, 
-            req.page_text, 
-            req.links_count
-        )
-        features_dict = url_extractor.extract_features(
-            req.url, 
-            req.page_text, 
-            req.links_count
-        )
+        # The model scores the URL as sent; only the cache key (and so the
+        # single-flight key) is canonical
+        page_context = url_extractor.page_context_features(req.page_text, req.links_count)
+        cache_key = (canonical_url,) + page_context
+        cached = url_prediction_cache.get(cache_key)
+        timer.mark('cache')
         
-        # Make prediction
-        features_2d = features.reshape(1, -1)
-        probability = url_model.predict_proba(features_2d)[0][1]
-        prediction = url_model.predict(features_2d)[0]
+        # Overloaded or out of time: the heuristic score, not a queue
+        if cached is None:
+            shed_reason = url_shedder.check(
+                request_budget_ms(req), (time.time() - start_time) * 1000
+            )
+            if shed_reason is not None:
+                response = {
+                    'url': req.url,
+                    **degraded_result(
+                        heuristic_url_score(req.url, req.page_text, req.links_count, config.MAX_SCAN_CHARS),
+                        shed_reason
+                    ),
+                    'cached': False,
+                    'processing_time_ms': (time.time() - start_time) * 1000
+                }
+                timer.mark('shed')
+                logger.warning(f"URL prediction shed ({shed_reason}): {req.url[:50]}... -> {response['risk_level']}")
+                body = jsonify(response)
+                timer.mark('serialize')
+                return body, 200
         
-        # Calculate risk score
-        risk_score = probability * 100
+        def score_url():
+            # Extract features once into this thread's row (matching your frontend)
+            features_2d = get_feature_row('url')
+            url_extractor.extract_features_into(
+                features_2d[0],
+                req.url,
+                page_context=page_context
+            )
+            timer.mark('extract')
+            
+            # Make prediction
+            probabilities, predictions = model.score(features_2d)
+            value = (float(probabilities[0]), int(predictions[0]))
+            url_prediction_cache.set(cache_key, value, cache_generation)
+            timer.mark('inference')
+            return value
         
-        # Determine risk level (matching your contentScript.js)
-        if risk_score <= 30:
-            risk_level = 'Safe'
-        elif risk_score <= 60:
-            risk_level = 'Suspicious'
+        # Concurrent requests for the same key wait for one computation
+        features_extracted = False
+        coalesced = False
+        if cached is None:
+            with url_shedder.track():
+                (probability, prediction), coalesced = url_flights.do(cache_key, score_url)
+            features_extracted = not coalesced
+            if coalesced:
+                timer.mark('coalesced')
         else:
-            risk_level = 'Dangerous'
+            probability, prediction = cached
+        
+        # Calculate risk score
+        risk_score = probability * 100
+        risk_level = get_risk_level(risk_score)
         
         response = {
             'url': req.url,
@@ -132,17 +594,31 @@ def predict_url():
             'risk_level': risk_level,
             'prediction': int(prediction),
             'is_phishing': bool(prediction == 1),
+            'cached': cached is not None,
+            'coalesced': coalesced,
+            'source': 'model',
+            'degraded': False,
             'processing_time_ms': (time.time() - start_time) * 1000
         }
         
         # Include features if requested
         if req.return_features:
-            response['features'] = features_dict
+            features_2d = get_feature_row('url')
+            if not features_extracted:
+                url_extractor.extract_features_into(
+                    features_2d[0], req.url, page_context=page_context
+                )
+            response['features'] = url_extractor.features_to_dict(features_2d[0])
             response['feature_names'] = url_extractor.get_feature_names()
         
         logger.info(f"URL prediction: {req.url[:50]}... -> {risk_level} ({risk_score:.2f})")
-        return jsonify(response), 200
+        body = jsonify(response)
+        timer.mark('serialize')
+        return body, 200
         
+    except RequestEntityTooLarge:
+        # Chunked body over the cap: answered by request_too_large
+        raise
     except Exception as e:
         logger.error(f"Error in URL prediction: {e}")
         return jsonify(ErrorResponse(
@@ -151,73 +627,204 @@ def predict_url():
             status_code=400
         ).dict()), 400
 
-@app.route('/predict/email', methods=['POST'])
-def predict_email():
+@app.route('/predict/url/batch', methods=['POST'])
+def predict_url_batch():
     """
-    Predict if an email is phishing
+    Predict many URLs in one request with a single model call
     Expected JSON: {
-        "subject": "Email subject",
-        "body": "Email body",
-        "links": ["link1", "link2"]
+        "urls": [
+            {"url": "https://example.com", "page_text": "", "links_count": 0},
+            ...
+        ],
+        "return_features": false
     }
     """
     start_time = time.time()
     
     try:
         # Parse request
+        timer = g.timer
         data = request.get_json()
-        req = EmailPredictRequest(**data)
+        timer.mark('parse')
+        req = URLBatchPredictRequest(**data)
+        timer.mark('validate')
         
-        # Check if model is loaded
-        if email_model is None:
+        if len(req.urls) > config.MAX_BATCH_SIZE:
+            return jsonify(ErrorResponse(
+                error="Batch too large",
+                detail=f"At most {config.MAX_BATCH_SIZE} URLs are accepted per batch.",
+                status_code=413
+            ).dict()), 413
+        
+        # Check if model is loaded; read the cache generation before the
+        # model so a concurrent reload can't leave old results in the cache
+        ensure_models_loaded()
+        cache_generation = url_prediction_cache.generation
+        model = url_model
+        timer.skip()
+        if model is None:
             return jsonify(ErrorResponse(
                 error="Model not loaded",
-                detail="Email model is not available. Please train the model first.",
+                detail="URL model is not available. Please train the model first.",
                 status_code=503
             ).dict()), 503
         
-        # Extract features (matching your contentScript.js)
-        features = email_extractor.extract_features_array(
-            req.subject, req.body, req.links
-        )
-        features_dict = email_extractor.extract_features(
-            req.subject, req.body, req.links
-        )
+        if not req.urls:
+            return jsonify({
+                'results': [],
+                'count': 0,
+                'processing_time_ms': (time.time() - start_time) * 1000
+            }), 200
         
-        # Make prediction
-        features_2d = features.reshape(1, -1)
-        probability = email_model.predict_proba(features_2d)[0][1]
-        prediction = email_model.predict(features_2d)[0]
+        results = score_urls(model, req.urls, cache_generation, req.return_features, timer)
         
-        # Calculate risk score
-        risk_score = probability * 100
+        response = {
+            'results': results,
+            'count': len(results),
+            'processing_time_ms': (time.time() - start_time) * 1000
+        }
+        if req.return_features:
+            response['feature_names'] = url_extractor.get_feature_names()
         
-        # Determine risk level (matching your contentScript.js)
-        if risk_score <= 30:
-            risk_level = 'Safe'
-        elif risk_score <= 60:
-            risk_level = 'Suspicious'
-        else:
-            risk_level = 'Dangerous'
+        logger.info(f"URL batch prediction: {len(results)} URLs in {response['processing_time_ms']:.2f} ms")
+        body = jsonify(response)
+        timer.mark('serialize')
+        return body, 200
+        
+    except RequestEntityTooLarge:
+        # Chunked body over the cap: answered by request_too_large
+        raise
+    except Exception as e:
+        logger.error(f"Error in URL batch prediction: {e}")
+        return jsonify(ErrorResponse(
+            error="Prediction failed",
+            detail=str(e),
+            status_code=400
+        ).dict()), 400
+
+def respond_email(req, start_time, timer):
+    """
+    Score a validated EmailPredictRequest and build the response
+    (shared by /predict/email and /predict/email/raw)
+    """
+    # Check if model is loaded
+    ensure_models_loaded()
+    model = email_model
+    timer.skip()
+    if model is None:
+        return jsonify(ErrorResponse(
+            error="Model not loaded",
+            detail="Email model is not available. Please train the model first.",
+            status_code=503
+        ).dict()), 503
+    
+    # Exact feature values for return_features (the float32 row rounds ratios)
+    exact_features = None
+    
+    def score_email():
+        nonlocal exact_features
+        # Extract features once into this thread's row (matching your contentScript.js)
+        features_2d = get_feature_row('email')
+        exact_features = email_extractor.compute_features(req.subject, req.body, req.links)
+        features_2d[0] = exact_features
+        timer.mark('extract')
         
+        # Make prediction
+        probabilities, predictions = model.score(features_2d)
+        timer.mark('inference')
+        return float(probabilities[0]), int(predictions[0])
+    
+    # Identical concurrent emails (same subject, body and links) share
+    # one computation; the tuple itself is the key so matches are exact
+    shed_reason = email_shedder.check(
+        request_budget_ms(req), (time.time() - start_time) * 1000
+    )
+    if shed_reason is not None:
         response = {
             'subject': req.subject[:50] + '...' if len(req.subject) > 50 else req.subject,
-            'probability': float(probability),
-            'risk_score': float(risk_score),
-            'risk_level': risk_level,
-            'prediction': int(prediction),
-            'is_phishing': bool(prediction == 1),
+            **degraded_result(
+                heuristic_email_score(req.subject, req.body, req.links, config.MAX_SCAN_CHARS),
+                shed_reason
+            ),
             'processing_time_ms': (time.time() - start_time) * 1000
         }
+        timer.mark('shed')
+        logger.warning(f"Email prediction shed ({shed_reason}) -> {response['risk_level']}")
+        body = jsonify(response)
+        timer.mark('serialize')
+        return body, 200
+    
+    flight_key = (req.subject, req.body, tuple(req.links or ()))
+    with email_shedder.track():
+        (probability, prediction), coalesced = email_flights.do(flight_key, score_email)
+    if coalesced:
+        timer.mark('coalesced')
+    
+    # Calculate risk score
+    risk_score = probability * 100
+    risk_level = get_risk_level(risk_score)
+    
+    link_risk = None
+    if req.score_links:
+        link_risk = score_email_links([req.links])[0]
+        timer.mark('links')
+    
+    response = {
+        'subject': req.subject[:50] + '...' if len(req.subject) > 50 else req.subject,
+        'probability': float(probability),
+        'risk_score': float(risk_score),
+        'risk_level': risk_level,
+        'prediction': int(prediction),
+        'is_phishing': bool(prediction == 1),
+        'coalesced': coalesced,
+        'source': 'model',
+        'degraded': False,
+        'processing_time_ms': (time.time() - start_time) * 1000
+    }
+    if req.score_links:
+        response['link_risk'] = link_risk
+    
+    # Include features if requested
+    if req.return_features:
+        if exact_features is None:
+            # Coalesced: another request extracted them
+            exact_features = email_extractor.compute_features(req.subject, req.body, req.links)
+        response['features'] = email_extractor.features_to_dict(exact_features)
+        response['feature_names'] = email_extractor.get_feature_names()
+    
+    logger.info(f"Email prediction -> {risk_level} ({risk_score:.2f})")
+    body = jsonify(response)
+    timer.mark('serialize')
+    return body, 200
+
+@app.route('/predict/email', methods=['POST'])
+def predict_email():
+    """
+    Predict if an email is phishing
+    Expected JSON: {
+        "subject": "Email subject",
+        "body": "Email body",
+        "links": ["link1", "link2"],
+        "score_links": false  (optional: URL model risk per link + max/mean),
+        "latency_budget_ms": 50  (optional, or X-Latency-Budget-Ms header)
+    }
+    """
+    start_time = time.time()
+    
+    try:
+        # Parse request
+        timer = g.timer
+        data = request.get_json()
+        timer.mark('parse')
+        req = EmailPredictRequest(**data)
+        timer.mark('validate')
         
-        # Include features if requested
-        if req.return_features:
-            response['features'] = features_dict
-            response['feature_names'] = email_extractor.get_feature_names()
+        return respond_email(req, start_time, timer)
         
-        logger.info(f"Email prediction -> {risk_level} ({risk_score:.2f})")
-        return jsonify(response), 200
         
+    except RequestEntityTooLarge:
+        # Chunked body over the cap: answered by request_too_large
+        raise
     except Exception as e:
         logger.error(f"Error in Email prediction: {e}")
         return jsonify(ErrorResponse(
@@ -226,6 +833,43 @@ def predict_email():
             status_code=400
         ).dict()), 400
 
+@app.route('/predict/email/raw', methods=['POST'])
+def predict_email_raw():
+    """
+    Predict from a raw RFC 822 / MIME message (e.g. an .eml file) sent as
+    the request body, plain or chunked; parsed while it is read
+    Query: return_features=true, score_links=true (optional);
+    X-Latency-Budget-Ms header
+    """
+    start_time = time.time()
+    
+    try:
+        timer = g.timer
+        chunks = iter(lambda: request.stream.read(READ_SIZE), b'')
+        parsed = parse_message(chunks, max_bytes=config.MAX_CONTENT_LENGTH, max_chars=config.MAX_SCAN_CHARS)
+        timer.mark('parse')
+        req = EmailPredictRequest(
+            subject=parsed.subject,
+            body=parsed.body,
+            links=parsed.links,
+            return_features=request.args.get('return_features', '').lower() in ('1', 'true'),
+            score_links=request.args.get('score_links', '').lower() in ('1', 'true')
+        )
+        timer.mark('validate')
+        
+        return respond_email(req, start_time, timer)
+        
+    except (MessageTooLarge, RequestEntityTooLarge):
+        # Chunked uploads have no declared length, so the cap hits mid-stream
+        return too_large_response()
+    except Exception as e:
+        logger.error(f"Error in raw Email prediction: {e}")
+        return jsonify(ErrorResponse(
+            error="Prediction failed",
+            detail=str(e),
+            status_code=400
+        ).dict()), 400
+
 @app.route('/features/url', methods=['POST'])
 def extract_url_features_only():
     """Just extract URL features without prediction"""
@@ -245,6 +889,8 @@ def extract_url_features_only():
             'feature_names': url_extractor.get_feature_names()
         }), 200
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -263,15 +909,137 @@ def extract_email_features_only():
             'feature_names': email_extractor.get_feature_names()
         }), 200
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+def is_admin_request():
+    """
+    Admin calls need ADMIN_TOKEN; without one they are refused, unless
+    ADMIN_ALLOW_LOCALHOST (development) lets localhost in
+    """
+    if config.ADMIN_TOKEN:
+        token = request.headers.get('X-Admin-Token', '')
+        return hmac.compare_digest(token.encode('utf-8'), config.ADMIN_TOKEN.encode('utf-8'))
+    return config.ADMIN_ALLOW_LOCALHOST and request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Reload models from disk without restarting
+    Expected JSON (optional): {
+        "model": "url" | "email" | "all",
+        "wait": true
+    }
+    With wait=false the reload runs in the background and 202 is returned
+    Under serve.py the master reloads both models and replaces the
+    workers, so 202 is always returned
+    """
+    if not is_admin_request():
+        return jsonify(ErrorResponse(
+            error="Forbidden",
+            detail="Admin token required",
+            status_code=403
+        ).dict()), 403
+    
+    data = request.get_json(silent=True) or {}
+    target = data.get('model', 'all')
+    wait = data.get('wait', True)
+    
+    if target not in ('url', 'email', 'all'):
+        return jsonify({"error": "model must be 'url', 'email' or 'all'"}), 400
+    model_types = ['url', 'email'] if target == 'all' else [target]
+    
+    if prefork_master_pid is not None:
+        os.kill(prefork_master_pid, signal.SIGHUP)
+        return jsonify({'status': 'reloading', 'models': ['url', 'email'], 'prefork': True}), 202
+    
+    if not wait:
+        def reload_in_background():
+            for model_type in model_types:
+                try:
+                    reload_model(model_type)
+                except Exception as e:
+                    logger.error(f"❌ Reload of {model_type} model failed: {e}")
+        
+        threading.Thread(target=reload_in_background, name='model-reload', daemon=True).start()
+        return jsonify({'status': 'reloading', 'models': model_types}), 202
+    
+    results = {}
+    for model_type in model_types:
+        try:
+            scorer = reload_model(model_type)
+            results[model_type] = {'reloaded': True, 'engine': scorer.engine}
+        except Exception as e:
+            logger.error(f"❌ Reload of {model_type} model failed: {e}")
+            results[model_type] = {'reloaded': False, 'error': str(e)}
+    
+    status_code = 200 if all(r['reloaded'] for r in results.values()) else 500
+    return jsonify({'models': results}), status_code
+
+@app.route('/admin/domain-index', methods=['POST'])
+def admin_domain_index():
+    """
+    Add a feed file to the domain index without restarting
+    Expected JSON: {
+        "feed": "/path/to/feed.csv",
+        "kind": "block" | "allow",
+        "rebuild": false
+    }
+    By default the feed is merged into the live index; rebuild=true
+    builds a fresh index from the configured feeds plus this one and
+    swaps it in
+    """
+    global domain_index
+    
+    if not is_admin_request():
+        return jsonify(ErrorResponse(
+            error="Forbidden",
+            detail="Admin token required",
+            status_code=403
+        ).dict()), 403
+    
+    if prefork_master_pid is not None:
+        # A worker's index is its own copy; the master rebuilds on reload
+        return jsonify(ErrorResponse(
+            error="Conflict",
+            detail="Pre-fork workers share the master's index: add the feed to "
+                   "BLOCKLIST_FEEDS/ALLOWLIST_FEEDS and POST /admin/reload.",
+            status_code=409
+        ).dict()), 409
+    
+    data = request.get_json(silent=True) or {}
+    feed = data.get('feed')
+    kind = data.get('kind', 'block')
+    
+    if kind not in ('block', 'allow'):
+        return jsonify({"error": "kind must be 'block' or 'allow'"}), 400
+    if feed and not os.path.exists(feed):
+        return jsonify({"error": f"Feed not found: {feed}"}), 404
+    
+    try:
+        if data.get('rebuild'):
+            domain_index = load_domain_index(feed, kind)
+        elif feed:
+            domain_index.load_feed(feed, kind)
+        else:
+            return jsonify({"error": "feed is required unless rebuild is set"}), 400
+    except Exception as e:
+        logger.error(f"❌ Failed to update domain index: {e}")
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({'domain_index': domain_index.stats()}), 200
+
 @app.route('/info', methods=['GET'])
 def get_info():
     """Get model and feature information"""
     return jsonify({
         'version': '1.0.0',
         'url_features': url_extractor.get_feature_names(),
+        'max_batch_size': config.MAX_BATCH_SIZE,
+        'max_content_length': config.MAX_CONTENT_LENGTH,
+        'max_scan_chars': config.MAX_SCAN_CHARS,
         'email_features': email_extractor.get_feature_names(),
         'risk_thresholds': {
             'safe': 30,
@@ -281,13 +1049,50 @@ def get_info():
         'models_loaded': {
             'url': url_model is not None,
             'email': email_model is not None
-        }
+        },
+        'prediction_cache': url_prediction_cache.stats(),
+        'domain_index': domain_index.stats(),
+        'host_cache': url_extractor.cache_info(),
+        'single_flight': {
+            'url': url_flights.stats(),
+            'email': email_flights.stats()
+        },
+        'load_shedding': {
+            'url': url_shedder.stats(),
+            'email': email_shedder.stats()
+        },
+        'micro_batching': {name: batcher.stats() for name, batcher in micro_batchers.items()}
     }), 200
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: request counts, errors and per-stage latency"""
+    cache_stats = url_prediction_cache.stats()
+    extra = {
+        'prediction_cache_hits_total': ('counter', 'URL prediction cache hits', cache_stats['hits']),
+        'prediction_cache_misses_total': ('counter', 'URL prediction cache misses', cache_stats['misses']),
+        'prediction_cache_evictions_total': ('counter', 'URL prediction cache evictions', cache_stats['evictions']),
+        'prediction_cache_size': ('gauge', 'URL prediction cache entries', cache_stats['size']),
+        'url_load_shed_total': ('counter', 'URL predictions answered by the heuristic', sum(url_shedder.shed.values())),
+        'email_load_shed_total': ('counter', 'Email predictions answered by the heuristic', sum(email_shedder.shed.values()))
+    }
+    for name, batcher in micro_batchers.items():
+        batch_stats = batcher.stats()
+        extra[f'{name}_micro_batches_total'] = ('counter', f'{name} micro-batches scored', batch_stats['batches'])
+        extra[f'{name}_micro_batch_items_total'] = ('counter', f'{name} requests scored in micro-batches', batch_stats['items'])
+    text = metrics.render(extra)
+    return text, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 # Load models when starting the app
-load_models()
+startup_timer.report(logger, "App imported", config.STARTUP_BUDGET_MS)
+start_model_loading()
+start_model_watcher()
 
 if __name__ == '__main__':
+    if issubclass(config, ProductionConfig):
+        # Production runs the pre-fork server (models loaded once, shared)
+        serve_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve.py')
+        os.execv(sys.executable, [sys.executable, serve_path] + sys.argv[1:])
     app.run(
         host=config.API_HOST,
         port=config.API_PORT,
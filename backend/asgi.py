@@ -0,0 +1,267 @@
+"""
+PhishGuard ASGI entry point
+Serves /predict/url and /predict/email through micro-batching schedulers;
+every other route is handed to the Flask app
+
+Run with any ASGI server, e.g.: uvicorn asgi:app --workers 4
+"""
+
+import asyncio
+import io
+import json
+import logging
+import sys
+import time
+
+import app as api
+from utils.micro_batcher import MicroBatcher
+from utils.metrics import NULL_TIMER
+from utils.load_shedder import LoadShedder, resolve_budget_ms
+from utils.heuristics import heuristic_url_score, heuristic_email_score
+from schemas.request_schemas import URLPredictRequest, EmailPredictRequest, ErrorResponse
+
+logger = logging.getLogger(__name__)
+config = api.config
+
+def _start_batch(items):
+    """Requests of (request, timer) items; each timer records its queue wait"""
+    for _, timer in items:
+        timer.mark('queue')
+    return [req for req, _ in items]
+
+def _score_url_batch(items):
+    """Runs in the executor: one model call for a whole micro-batch"""
+    reqs = _start_batch(items)
+    api.ensure_models_loaded()
+    cache_generation = api.url_prediction_cache.generation
+    model = api.url_model
+    if model is None:
+        return [None] * len(reqs)
+    return api.score_urls(model, reqs, cache_generation)
+
+def _score_email_batch(items):
+    """Runs in the executor: one model call for a whole micro-batch"""
+    reqs = _start_batch(items)
+    api.ensure_models_loaded()
+    model = api.email_model
+    if model is None:
+        return [None] * len(reqs)
+    return api.score_emails(model, reqs)
+
+url_batcher = MicroBatcher(
+    _score_url_batch,
+    max_batch_size=config.MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=config.MICRO_BATCH_MAX_WAIT_MS,
+    name='url'
+)
+email_batcher = MicroBatcher(
+    _score_email_batch,
+    max_batch_size=config.MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=config.MICRO_BATCH_MAX_WAIT_MS,
+    name='email'
+)
+
+# Requests waiting on a batcher; a whole batch is scored at once. They
+# stand in for the app's shedders, so /info and /metrics report them
+url_shedder = api.url_shedder = LoadShedder(
+    config.LOAD_SHED_MAX_QUEUE_DEPTH, parallelism=config.MICRO_BATCH_MAX_SIZE)
+email_shedder = api.email_shedder = LoadShedder(
+    config.LOAD_SHED_MAX_QUEUE_DEPTH, parallelism=config.MICRO_BATCH_MAX_SIZE)
+api.micro_batchers.update(url=url_batcher, email=email_batcher)
+
+def _heuristic_url(req, reason):
+    return {'url': req.url, **api.degraded_result(
+        heuristic_url_score(req.url, req.page_text, req.links_count, config.MAX_SCAN_CHARS), reason
+    )}
+
+def _heuristic_email(req, reason):
+    subject = req.subject[:50] + '...' if len(req.subject) > 50 else req.subject
+    return {'subject': subject, **api.degraded_result(
+        heuristic_email_score(req.subject, req.body, req.links, config.MAX_SCAN_CHARS), reason
+    )}
+
+# (request schema, batcher, shedder, heuristic, extractor, model name) per batched route
+BATCHED_ROUTES = {
+    '/predict/url': (URLPredictRequest, url_batcher, url_shedder, _heuristic_url, api.url_extractor, 'URL'),
+    '/predict/email': (EmailPredictRequest, email_batcher, email_shedder, _heuristic_email, api.email_extractor, 'Email'),
+}
+
+async def _read_body(receive, limit):
+    """Whole request body, or None once it grows past limit bytes"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+async def _send_json(send, status_code, payload, timer=NULL_TIMER):
+    body = json.dumps(payload).encode('utf-8')
+    timer.mark('serialize')
+    await send({
+        'type': 'http.response.start',
+        'status': status_code,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            (b'access-control-allow-origin', b'*'),
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+    timer.finish(status_code)
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key.decode('latin-1').lower() == name:
+            return value.decode('latin-1')
+    return None
+
+async def _predict(scope, body, send):
+    """Validate one prediction request and wait for its micro-batch"""
+    start_time = time.time()
+    schema, batcher, shedder, heuristic, extractor, name = BATCHED_ROUTES[scope['path']]
+    # Same endpoint label as the Flask route
+    timer = api.metrics.timer(scope['path'])
+
+    try:
+        data = json.loads(body or b'{}')
+        timer.mark('parse')
+        req = schema(**data)
+        timer.mark('validate')
+
+        # Queue too deep or no time left: answer with the heuristic score
+        shed_reason = shedder.check(
+            resolve_budget_ms(
+                req.latency_budget_ms,
+                _header(scope, 'x-latency-budget-ms'),
+                config.DEFAULT_LATENCY_BUDGET_MS
+            ),
+            (time.time() - start_time) * 1000
+        )
+        if shed_reason is not None:
+            result = heuristic(req, shed_reason)
+            timer.mark('shed')
+            result['processing_time_ms'] = (time.time() - start_time) * 1000
+            return await _send_json(send, 200, result, timer)
+
+        with shedder.track():
+            # The batch marks 'queue' when it starts scoring this request
+            result = await batcher.submit((req, timer))
+        timer.mark('inference')
+    except Exception as e:
+        logger.error(f"Error in {name} prediction: {e}")
+        return await _send_json(send, 400, ErrorResponse(
+            error="Prediction failed",
+            detail=str(e),
+            status_code=400
+        ).dict(), timer)
+
+    if result is None:
+        return await _send_json(send, 503, ErrorResponse(
+            error="Model not loaded",
+            detail=f"{name} model is not available. Please train the model first.",
+            status_code=503
+        ).dict(), timer)
+
+    result['degraded'] = False
+    result['processing_time_ms'] = (time.time() - start_time) * 1000
+    if req.return_features:
+        result['feature_names'] = extractor.get_feature_names()
+    await _send_json(send, 200, result, timer)
+
+def _wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        # The body is already fully read, so its length is known
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').lower()
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            continue
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def _call_wsgi(environ):
+    """Run the Flask app synchronously and collect the full response"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    iterable = api.app(environ, start_response)
+    try:
+        body = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return response['status'], response['headers'], body
+
+async def _wsgi_fallback(scope, body, send):
+    loop = asyncio.get_running_loop()
+    status, headers, payload = await loop.run_in_executor(
+        None, _call_wsgi, _wsgi_environ(scope, body)
+    )
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            url_batcher.start()
+            email_batcher.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await url_batcher.stop()
+            await email_batcher.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    body = await _read_body(receive, config.MAX_CONTENT_LENGTH)
+    if body is None:
+        return await _send_json(send, 413, ErrorResponse(
+            error="Request too large",
+            detail=f"At most {config.MAX_CONTENT_LENGTH} bytes are accepted per request.",
+            status_code=413
+        ).dict())
+    if scope['method'] == 'POST' and scope['path'] in BATCHED_ROUTES:
+        return await _predict(scope, body, send)
+    await _wsgi_fallback(scope, body, send)
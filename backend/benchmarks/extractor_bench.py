@@ -0,0 +1,313 @@
+"""
+Feature Extractor Microbenchmarks
+Times URLFeatureExtractor / EmailFeatureExtractor on short, long and
+multi-megabyte inputs, reports ns/op and peak bytes allocated per call,
+and fails when a case regresses past the stored baseline
+
+Examples (from backend/):
+    python benchmarks/extractor_bench.py                      (check against the baseline)
+    python benchmarks/extractor_bench.py --update-baseline    (after an intended change)
+    python benchmarks/extractor_bench.py --cases url_short,email_large
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import gc
+import json
+import platform
+import random
+import string
+import timeit
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from feature_extraction.url_features import URLFeatureExtractor
+from feature_extraction.email_features import EmailFeatureExtractor
+from feature_extraction.keyword_matcher import KeywordMatcher
+
+# max_scan_chars of the capped cases (the server default, MAX_SCAN_CHARS)
+SCAN_CAP = 1024 * 1024
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extractor_baseline.json')
+
+# ===============================
+# Inputs (deterministic)
+# ===============================
+
+def _words(rng, n_bytes, vocabulary):
+    """Roughly n_bytes of space-separated words drawn from vocabulary"""
+    out = []
+    size = 0
+    while size < n_bytes:
+        word = rng.choice(vocabulary)
+        out.append(word)
+        size += len(word) + 1
+    return ' '.join(out)
+
+def build_inputs(seed=42):
+    rng = random.Random(seed)
+    filler = [
+        ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(2, 10)))
+        for _ in range(500)
+    ]
+    text_vocabulary = filler + [
+        'Account', 'URGENT', 'verify', 'invoice', 'password', 'click now!',
+        'NOW', 'Update', 'security', 'attachment.pdf', 'https://example.com'
+    ]
+
+    long_host = '.'.join(
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+        for _ in range(40)
+    )
+    obfuscated_path = ''.join(
+        rng.choice(['%2F', '%40', '-', '_', '=', '&', '?', 'a', 'B', '9', '.'])
+        for _ in range(3000)
+    )
+    long_url = f"http://user:pa$$@{long_host}.com:8080/secure-login/{obfuscated_path}?redirect=http://10.0.0.1/verify"
+
+    page_text = _words(rng, 2 * 1024 * 1024, text_vocabulary)
+    body = _words(rng, 4 * 1024 * 1024, text_vocabulary)
+
+    keyword_vocabulary = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+        for _ in range(300)
+    ]
+    # No urgent word anywhere: the page is scanned up to the cap
+    clean_page_text = _words(rng, 4 * 1024 * 1024, filler)
+
+    # Texts with many distinct keyword hits (a matcher must not pay per hit)
+    def with_hits(n_bytes, n_hits):
+        words = _words(rng, n_bytes, filler).split(' ')
+        for i, keyword in zip(sorted(rng.sample(range(len(words)), n_hits)),
+                              rng.sample(keyword_vocabulary, n_hits)):
+            words[i] = keyword
+        return ' '.join(words).lower()
+
+    hit_texts = [with_hits(20 * 1024, 40) for _ in range(20)]
+    large_hit_text = with_hits(2400 * 1024, 150)
+
+    return {
+        'short_url': 'https://www.amazon.com/login',
+        'long_url': long_url,
+        'page_text': page_text,
+        'clean_page_text': clean_page_text,
+        'email_body': body,
+        'links': [f"https://link{i}.example.com/path" for i in range(25)],
+        'keywords': keyword_vocabulary,
+        'hit_texts': hit_texts,
+        'large_hit_text': large_hit_text,
+    }
+
+def build_cases(inputs):
+    """name -> (description, zero-argument callable)"""
+    url = URLFeatureExtractor()
+    capped_url = URLFeatureExtractor(max_scan_chars=SCAN_CAP)
+    email = EmailFeatureExtractor()
+    row = np.empty(url.NUM_FEATURES, dtype=np.float32)
+    email_row = np.empty(email.NUM_FEATURES, dtype=np.float32)
+
+    short_url = inputs['short_url']
+    long_url = inputs['long_url']
+    page_text = inputs['page_text']
+    clean_page_text = inputs['clean_page_text']
+    body = inputs['email_body']
+    links = inputs['links']
+    small_body = body[:2000]
+    page_text_lower = page_text.lower()
+    keywords = KeywordMatcher({'large': inputs['keywords']})
+    hit_texts = inputs['hit_texts']
+    large_hit_text = inputs['large_hit_text']
+
+    return {
+        'url_short': (
+            f"extract_features, {len(short_url)}-char URL",
+            lambda: url.extract_features(short_url)
+        ),
+        'url_short_array': (
+            f"extract_features_array, {len(short_url)}-char URL",
+            lambda: url.extract_features_array(short_url)
+        ),
+        'url_short_into': (
+            f"extract_features_into, {len(short_url)}-char URL",
+            lambda: url.extract_features_into(row, short_url)
+        ),
+        'url_long': (
+            f"extract_features, {len(long_url)}-char obfuscated URL",
+            lambda: url.extract_features(long_url)
+        ),
+        'url_long_array': (
+            f"extract_features_array, {len(long_url)}-char obfuscated URL",
+            lambda: url.extract_features_array(long_url)
+        ),
+        'url_page_text': (
+            f"extract_features_array, {len(page_text) // 1024} KiB page_text",
+            lambda: url.extract_features_array(short_url, page_text, 120)
+        ),
+        'url_page_text_capped': (
+            f"extract_features_array, {len(clean_page_text) // 1024} KiB page_text "
+            f"without a hit, {SCAN_CAP // 1024} KiB scan cap",
+            lambda: capped_url.extract_features_array(short_url, clean_page_text, 120)
+        ),
+        'email_short': (
+            f"extract_features, {len(small_body)}-char body",
+            lambda: email.extract_features('Verify your account', small_body, links[:3])
+        ),
+        'email_short_array': (
+            f"extract_features_array, {len(small_body)}-char body",
+            lambda: email.extract_features_array('Verify your account', small_body, links[:3])
+        ),
+        'email_large': (
+            f"extract_features_into, {len(body) // 1024} KiB body",
+            lambda: email.extract_features_into(email_row, 'URGENT: action required', body, links)
+        ),
+        'keywords_large': (
+            f"KeywordMatcher.match, {len(inputs['keywords'])} keywords, {len(page_text) // 1024} KiB text",
+            lambda: keywords.match(page_text_lower)
+        ),
+        'keywords_many_hits': (
+            f"KeywordMatcher.match, {len(hit_texts)} texts of {len(hit_texts[0]) // 1024} KiB "
+            f"with 40 keyword hits each",
+            lambda: [keywords.match(text) for text in hit_texts]
+        ),
+        'keywords_large_hits': (
+            f"KeywordMatcher.match, {len(large_hit_text) // 1024} KiB text with 150 keyword hits",
+            lambda: keywords.match(large_hit_text)
+        ),
+    }
+
+# ===============================
+# Measurement
+# ===============================
+
+def time_ns_per_op(fn, repeat=5, min_time=0.2):
+    """Best of `repeat` runs of an auto-sized loop, in ns per call"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+def peak_bytes_per_call(fn):
+    """Peak memory allocated during one call (after a warm-up call)"""
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - before)
+
+def run_cases(cases, names, repeat):
+    results = {}
+    for name in names:
+        description, fn = cases[name]
+        results[name] = {
+            'description': description,
+            'ns_per_op': time_ns_per_op(fn, repeat=repeat),
+            'peak_bytes': peak_bytes_per_call(fn),
+        }
+        print(f"   {name:18s} {results[name]['ns_per_op']:14,.0f} ns/op "
+              f"{results[name]['peak_bytes']:12,d} B peak   ({description})")
+    return results
+
+def find_regressions(results, baseline, time_tolerance, memory_tolerance, memory_slack):
+    """Cases slower or hungrier than the baseline allows"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('cases', {}).get(name)
+        if before is None:
+            continue
+        time_limit = before['ns_per_op'] * (1 + time_tolerance)
+        if result['ns_per_op'] > time_limit:
+            regressions.append(
+                f"{name}: {result['ns_per_op']:,.0f} ns/op > {time_limit:,.0f} "
+                f"(baseline {before['ns_per_op']:,.0f})"
+            )
+        memory_limit = before['peak_bytes'] * (1 + memory_tolerance) + memory_slack
+        if result['peak_bytes'] > memory_limit:
+            regressions.append(
+                f"{name}: {result['peak_bytes']:,d} B peak > {memory_limit:,.0f} "
+                f"(baseline {before['peak_bytes']:,d})"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the feature extractors")
+    parser.add_argument('--cases', help="comma-separated subset of cases")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store this run as the new baseline instead of checking")
+    parser.add_argument('--time-tolerance', type=float, default=0.25,
+                        help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.10,
+                        help="allowed growth of peak bytes vs baseline")
+    parser.add_argument('--memory-slack', type=int, default=1024,
+                        help="bytes always allowed on top of the memory tolerance")
+    parser.add_argument('--output', help="also write this run as JSON to this file")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("⏱️  FEATURE EXTRACTOR BENCHMARKS")
+    print("="*60)
+
+    cases = build_cases(build_inputs())
+    names = [name.strip() for name in args.cases.split(',')] if args.cases else list(cases)
+    unknown = [name for name in names if name not in cases]
+    if unknown:
+        parser.error(f"unknown cases: {unknown} (available: {', '.join(cases)})")
+
+    results = run_cases(cases, names, args.repeat)
+    run = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'cases': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        if os.path.exists(args.baseline):
+            # Keep baseline entries for cases that were not run this time
+            with open(args.baseline) as f:
+                previous = json.load(f).get('cases', {})
+            run['cases'] = {**previous, **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n✅ Baseline saved to: {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('meta', {}).get('platform') != run['meta']['platform']:
+        print(f"\n⚠️ Baseline was recorded on {baseline.get('meta', {}).get('platform')}; "
+              "timings may not be comparable")
+
+    regressions = find_regressions(
+        results, baseline, args.time_tolerance, args.memory_tolerance, args.memory_slack
+    )
+    if regressions:
+        print("\n❌ REGRESSIONS vs baseline:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+
+    print("\n✅ No regressions vs baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
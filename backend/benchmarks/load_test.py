@@ -0,0 +1,395 @@
+"""
+PhishGuard API Load Test
+Replays url_dataset.csv / email_dataset.csv against the API at a fixed
+concurrency and reports throughput and p50/p95/p99 latency per endpoint
+
+Examples (from backend/):
+    python benchmarks/load_test.py --target client
+    python benchmarks/load_test.py --target server --concurrency 16 --output after.json --compare before.json
+    python benchmarks/load_test.py --target http://localhost:8000   (already running, e.g. uvicorn asgi:app)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import http.client
+import itertools
+import json
+import platform
+import random
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(BACKEND_DIR, 'dataset')
+
+ENDPOINTS = {
+    'url': '/predict/url',
+    'url_batch': '/predict/url/batch',
+    'email': '/predict/email',
+}
+
+# ===============================
+# Workload
+# ===============================
+
+def load_url_payloads(dataset_path):
+    df = pd.read_csv(dataset_path)
+    df['url'] = df['url'].fillna('').astype(str)
+    page_text = df['page_text'].fillna('').astype(str) if 'page_text' in df.columns else [''] * len(df)
+    links_count = (
+        pd.to_numeric(df['links_count'], errors='coerce').fillna(0).astype(int)
+        if 'links_count' in df.columns else [0] * len(df)
+    )
+    return [
+        {'url': url, 'page_text': text, 'links_count': int(count)}
+        for url, text, count in zip(df['url'], page_text, links_count)
+    ]
+
+def load_email_payloads(dataset_path):
+    df = pd.read_csv(dataset_path)
+    subjects = df['subject'].fillna('').astype(str)
+    bodies = df['body'].fillna('').astype(str)
+    links = df['links'].fillna('').astype(str) if 'links' in df.columns else [''] * len(df)
+    # Links are pipe-separated, as in train_email_model.py
+    return [
+        {'subject': subject, 'body': body, 'links': [link for link in link_list.split('|') if link]}
+        for subject, body, link_list in zip(subjects, bodies, links)
+    ]
+
+def bust_cache(payload, n):
+    """Make a URL payload unique so it misses the server-side cache"""
+    url = payload['url']
+    separator = '&' if '?' in url.split('#', 1)[0] else '?'
+    base, hash_mark, fragment = url.partition('#')
+    return {**payload, 'url': f"{base}{separator}lt={n}{hash_mark}{fragment}"}
+
+class Workload:
+    """Cycles through shuffled dataset rows, thread-safe"""
+
+    def __init__(self, endpoint, url_payloads, email_payloads, batch_size=32,
+                 cache_busting=False, seed=42):
+        rows = list(email_payloads if endpoint == 'email' else url_payloads)
+        random.Random(seed).shuffle(rows)
+        if not rows:
+            raise ValueError(f"No dataset rows for endpoint '{endpoint}'")
+        self.endpoint = endpoint
+        self.rows = rows
+        self.batch_size = batch_size
+        self.cache_busting = cache_busting and endpoint != 'email'
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _row(self, n):
+        row = self.rows[n % len(self.rows)]
+        return bust_cache(row, n) if self.cache_busting else row
+
+    def next_payload(self):
+        with self._lock:
+            n = next(self._counter)
+        if self.endpoint == 'url_batch':
+            start = n * self.batch_size
+            return {'urls': [self._row(start + i) for i in range(self.batch_size)]}
+        return self._row(n)
+
+# ===============================
+# Transports
+# ===============================
+
+class TestClientTransport:
+    """In-process Flask test client (no network, one client per thread)"""
+    name = 'client'
+
+    def __init__(self):
+        import app as api
+        api.ensure_models_loaded()
+        self.app = api.app
+        self._local = threading.local()
+
+    def post(self, path, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.post(path, json=payload)
+        return response.status_code
+
+    def close(self):
+        pass
+
+class HTTPTransport:
+    """Real HTTP over one keep-alive connection per thread"""
+
+    def __init__(self, base_url, process=None):
+        parsed = urlparse(base_url)
+        self.name = base_url
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 80
+        self.process = process
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return connection
+
+    def get(self, path):
+        connection = self._connection()
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def post(self, path, payload):
+        body = json.dumps(payload).encode('utf-8')
+        connection = self._connection()
+        try:
+            connection.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # The server closed the keep-alive connection; retry on a new one
+            connection.close()
+            connection.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+        response.read()
+        if response.will_close:
+            connection.close()
+        return response.status
+
+    def wait_ready(self, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process is not None and self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}")
+            try:
+                if self.get('/health') == 200:
+                    return
+            except (OSError, http.client.HTTPException):
+                self._local.connection = None
+            time.sleep(0.2)
+        raise TimeoutError(f"{self.name} did not become healthy within {timeout}s")
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_local_server():
+    """Run app.py under the threaded Werkzeug server in a subprocess"""
+    port = free_port()
+    code = (
+        "from werkzeug.serving import run_simple\n"
+        "import app\n"
+        f"run_simple('127.0.0.1', {port}, app.app, threaded=True)\n"
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-c', code],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    transport = HTTPTransport(f"http://127.0.0.1:{port}", process)
+    transport.name = 'server'
+    return transport
+
+# ===============================
+# Runner
+# ===============================
+
+def run_endpoint(transport, workload, path, concurrency, total_requests, warmup):
+    """Send total_requests from `concurrency` threads; returns the summary"""
+    for _ in range(warmup):
+        transport.post(path, workload.next_payload())
+
+    latencies = np.zeros(total_requests, dtype=np.float64)
+    statuses = {}
+    errors = []
+    claimed = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            i = next(claimed)
+            if i >= total_requests:
+                return
+            payload = workload.next_payload()
+            start = time.perf_counter()
+            try:
+                status = transport.post(path, payload)
+            except Exception as e:
+                status = 'error'
+                with lock:
+                    errors.append(str(e))
+            latencies[i] = time.perf_counter() - start
+            with lock:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    latencies_ms = latencies * 1000
+    ok = statuses.get('200', 0)
+    items_per_request = workload.batch_size if workload.endpoint == 'url_batch' else 1
+    return {
+        'path': path,
+        'requests': total_requests,
+        'concurrency': concurrency,
+        'wall_seconds': wall,
+        'throughput_rps': total_requests / wall if wall else 0.0,
+        'items_per_second': total_requests * items_per_request / wall if wall else 0.0,
+        'latency_ms': {
+            'mean': float(latencies_ms.mean()),
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p95': float(np.percentile(latencies_ms, 95)),
+            'p99': float(np.percentile(latencies_ms, 99)),
+            'max': float(latencies_ms.max()),
+        },
+        'status_codes': statuses,
+        'error_rate': 1 - ok / total_requests,
+        'sample_errors': errors[:5],
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_summary(name, summary):
+    latency = summary['latency_ms']
+    print(f"\n📊 {name} ({summary['path']})")
+    print(f"   Throughput: {summary['throughput_rps']:.1f} req/s ({summary['items_per_second']:.1f} items/s)")
+    print(f"   Latency:    p50 {latency['p50']:.2f} ms | p95 {latency['p95']:.2f} ms | "
+          f"p99 {latency['p99']:.2f} ms | max {latency['max']:.2f} ms")
+    print(f"   Status:     {summary['status_codes']}")
+    if summary['sample_errors']:
+        print(f"   ⚠️ Errors:  {summary['sample_errors'][0]}")
+
+def compare(results, baseline):
+    """Print the change of each metric against an earlier result file"""
+    print("\n" + "="*60)
+    print(f"🔍 COMPARISON vs {baseline['meta'].get('commit') or 'baseline'}")
+    print("="*60)
+    for name, summary in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            print(f"\n{name}: not in baseline")
+            continue
+        print(f"\n{name}:")
+        rows = [('throughput_rps', summary['throughput_rps'], before['throughput_rps'], True)]
+        for p in ('p50', 'p95', 'p99'):
+            rows.append((p, summary['latency_ms'][p], before['latency_ms'][p], False))
+        for metric, now, then, higher_is_better in rows:
+            change = (now - then) / then * 100 if then else 0.0
+            better = change > 0 if higher_is_better else change < 0
+            marker = '✅' if better else ('⚠️' if abs(change) >= 5 else '  ')
+            print(f"   {marker} {metric:15s} {then:10.2f} -> {now:10.2f} ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the PhishGuard API")
+    parser.add_argument('--target', default='client',
+                        help="'client' (Flask test client), 'server' (start a local server) or a base URL")
+    parser.add_argument('--endpoints', default='url,email,url_batch',
+                        help=f"comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help="requests per endpoint")
+    parser.add_argument('--warmup', type=int, default=50, help="untimed requests per endpoint")
+    parser.add_argument('--batch-size', type=int, default=32, help="URLs per /predict/url/batch request")
+    parser.add_argument('--cache-busting', action='store_true',
+                        help="make every URL unique so the prediction cache never hits")
+    parser.add_argument('--url-dataset', default=os.path.join(DATASET_DIR, 'url_dataset.csv'))
+    parser.add_argument('--email-dataset', default=os.path.join(DATASET_DIR, 'email_dataset.csv'))
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="earlier JSON result file to compare against")
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {unknown}")
+
+    print("="*60)
+    print("🚀 PHISHGUARD LOAD TEST")
+    print("="*60)
+
+    url_payloads = load_url_payloads(args.url_dataset)
+    email_payloads = load_email_payloads(args.email_dataset)
+    print(f"📂 Replaying {len(url_payloads)} URLs and {len(email_payloads)} emails")
+
+    if args.target == 'client':
+        transport = TestClientTransport()
+    elif args.target == 'server':
+        transport = start_local_server()
+    else:
+        transport = HTTPTransport(args.target)
+
+    try:
+        if isinstance(transport, HTTPTransport):
+            transport.wait_ready()
+        print(f"🎯 Target: {transport.name} | concurrency {args.concurrency} | "
+              f"{args.requests} requests per endpoint")
+
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'target': transport.name,
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'batch_size': args.batch_size,
+                'cache_busting': args.cache_busting,
+            },
+            'endpoints': {}
+        }
+        for name in endpoints:
+            workload = Workload(
+                name, url_payloads, email_payloads,
+                batch_size=args.batch_size, cache_busting=args.cache_busting
+            )
+            summary = run_endpoint(
+                transport, workload, ENDPOINTS[name],
+                args.concurrency, args.requests, args.warmup
+            )
+            results['endpoints'][name] = summary
+            print_summary(name, summary)
+    finally:
+        transport.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
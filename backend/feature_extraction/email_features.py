@@ -3,109 +3,162 @@ Email Feature Extraction Module
 Matches EXACTLY with your contentScript.js extractEmailFeatures()
 """
 
-import re
 import numpy as np
 
+from .keyword_matcher import KeywordMatcher
+from .text_stats import CharStats, iter_chunks, char_stats
+
 class EmailFeatureExtractor:
-    def __init__(self):
+    # Model input order
+    FEATURE_NAMES = (
+        'email_length',
+        'link_count',
+        'urgent_word_count',
+        'suspicious_keyword_count',
+        'capital_ratio',
+        'exclamation_count',
+        'attachment_keyword_count'
+    )
+    NUM_FEATURES = len(FEATURE_NAMES)
+    FLOAT_FEATURES = ('capital_ratio',)
+    
+    def __init__(self, max_scan_chars=None):
+        # Only this many characters of subject + body are scanned for
+        # keywords and character counts (None: all); email_length is exact
+        self.max_scan_chars = max_scan_chars
+        
         # From contentScript.js
         self.urgent_words = ['urgent', 'immediately', 'asap', 'action required', 'verify', 'now']
         self.suspicious_words = ['bank', 'password', 'account', 'login', 'update', 'security']
         self.attachment_words = ['invoice', 'attachment', 'pdf', 'document', 'file']
         
-    def extract_features(self, subject, body, links=None):
+        # All three lists are matched in one pass over the email text
+        self.keywords = KeywordMatcher({
+            'urgent': self.urgent_words,
+            'suspicious': self.suspicious_words,
+            'attachment': self.attachment_words
+        })
+        
+    def compute_features(self, subject, body, links=None):
         """
-        Extract all features from email
-        Matches contentScript.js extractEmailFeatures() EXACTLY
+        Single extraction pass over the email
+        Returns feature values as a tuple in FEATURE_NAMES order
         """
         subject = str(subject or '')
         body = str(body or '')
         links = links or []
         
-        email_text = subject + ' ' + body
-        email_text_lower = email_text.lower()
-        
-        features = {
-            'email_length': len(email_text),
-            'link_count': len(links),
-            'urgent_word_count': self._count_urgent_words(email_text_lower),
-            'suspicious_keyword_count': self._count_suspicious_words(email_text_lower),
-            'capital_ratio': self._calculate_capital_ratio(email_text),
-            'exclamation_count': email_text.count('!'),
-            'attachment_keyword_count': self._count_attachment_words(email_text_lower)
-        }
+        # One chunked pass over subject + ' ' + body: character counts and
+        # keywords together, without building or lowercasing the whole text
+        stats = CharStats()
+        keyword_counts = self.keywords.group_counts(
+            self.keywords.match_chunks(self._lower_chunks((subject, ' ', body), stats))
+        )
         
-        return features
+        return (
+            len(subject) + 1 + len(body),
+            len(links),
+            keyword_counts['urgent'],
+            keyword_counts['suspicious'],
+            stats.capital_ratio,
+            stats.exclamations,
+            keyword_counts['attachment']
+        )
+    
+    def extract_features(self, subject, body, links=None):
+        """
+        Extract all features from email
+        Matches contentScript.js extractEmailFeatures() EXACTLY
+        """
+        return dict(zip(self.FEATURE_NAMES, self.compute_features(subject, body, links)))
+    
+    def extract_features_into(self, out, subject, body, links=None):
+        """
+        Fill a preallocated row (e.g. one row of a batch buffer) with features
+        Returns the row so it can be passed straight to the model
+        """
+        out[:] = self.compute_features(subject, body, links)
+        return out
     
     def extract_features_array(self, subject, body, links=None):
-        """Extract features as array for model input"""
-        features = self.extract_features(subject, body, links)
-        return np.array([
-            features['email_length'],
-            features['link_count'],
-            features['urgent_word_count'],
-            features['suspicious_keyword_count'],
-            features['capital_ratio'],
-            features['exclamation_count'],
-            features['attachment_keyword_count']
-        ])
+        """Extract features as float32 array for model input"""
+        out = np.empty(self.NUM_FEATURES, dtype=np.float32)
+        return self.extract_features_into(out, subject, body, links)
     
-    def _count_urgent_words(self, text_lower):
-        """Count urgent words in text"""
-        # Ensure it's a string
-        if not isinstance(text_lower, str):
-            text_lower = str(text_lower) if text_lower is not None else ''
+    def extract_features_batch(self, subjects, bodies, links=None):
+        """
+        Feature matrix (n, NUM_FEATURES) float32 for whole columns at once
+        subjects, bodies: Series / arrays / lists; links: one list of
+        links per email (or None for no links at all)
+        Bit-identical to extract_features_array() row by row
+        """
+        import pandas as pd  # only batch callers (training) pay for pandas
         
-        count = 0
-        for word in self.urgent_words:
-            if word in text_lower:
-                count += 1
-        return count
-
-    def _count_suspicious_words(self, text_lower):
-        """Count suspicious words in text"""
-        # Ensure it's a string
-        if not isinstance(text_lower, str):
-            text_lower = str(text_lower) if text_lower is not None else ''
+        # str(value or ''), as compute_features does
+        subject = pd.Series(subjects, dtype=object).reset_index(drop=True).map(lambda value: str(value or ''))
+        body = pd.Series(bodies, dtype=object).reset_index(drop=True).map(lambda value: str(value or ''))
+        n = len(subject)
         
-        count = 0
-        for word in self.suspicious_words:
-            if word in text_lower:
-                count += 1
-        return count
-
-    def _count_attachment_words(self, text_lower):
-        """Count attachment-related words"""
-        # Ensure it's a string
-        if not isinstance(text_lower, str):
-            text_lower = str(text_lower) if text_lower is not None else ''
+        out = np.empty((n, self.NUM_FEATURES), dtype=np.float32)
+        if n == 0:
+            return out
         
-        count = 0
-        for word in self.attachment_words:
-            if word in text_lower:
-                count += 1
-        return count
-
+        if links is None:
+            link_count = np.zeros(n, dtype=np.int64)
+        else:
+            link_count = pd.Series(links, dtype=object).map(lambda value: len(value or [])).to_numpy()
+        
+        email_text = subject + ' ' + body
+        email_text_lower = email_text.str.lower()
+        keyword_counts = {
+            name: sum(
+                email_text_lower.str.contains(word, regex=False).to_numpy(dtype=np.int64)
+                for word in words
+            )
+            for name, words in self.keywords.groups.items()
+        }
+        
+        letters = email_text.str.count('[a-zA-Z]').to_numpy(dtype=np.int64)
+        capitals = email_text.str.count('[A-Z]').to_numpy(dtype=np.int64)
+        capital_ratio = np.zeros(n, dtype=np.float64)
+        np.divide(capitals, letters, out=capital_ratio, where=letters > 0)
+        
+        columns = {
+            'email_length': email_text.str.len().to_numpy(),
+            'link_count': link_count,
+            'urgent_word_count': keyword_counts['urgent'],
+            'suspicious_keyword_count': keyword_counts['suspicious'],
+            'capital_ratio': capital_ratio,
+            'exclamation_count': email_text.str.count('!').to_numpy(),
+            'attachment_keyword_count': keyword_counts['attachment'],
+        }
+        for i, name in enumerate(self.FEATURE_NAMES):
+            out[:, i] = columns[name]
+        return out
+    
+    def features_to_dict(self, row):
+        """
+        Build the feature dict from already extracted values
+        row: compute_features() result; a float32 row would round capital_ratio
+        """
+        return {
+            name: float(value) if name in self.FLOAT_FEATURES else int(value)
+            for name, value in zip(self.FEATURE_NAMES, row)
+        }
+    
+    def _lower_chunks(self, parts, stats):
+        """Lowercased chunks of the text, counting characters on the way"""
+        for chunk in iter_chunks(parts, limit=self.max_scan_chars):
+            stats.update(chunk)
+            yield chunk.lower()
+    
     def _calculate_capital_ratio(self, text):
         """Calculate ratio of capital letters to total letters"""
         # Ensure it's a string
         if not isinstance(text, str):
             text = str(text) if text is not None else ''
         
-        letters = re.findall(r'[a-zA-Z]', text)
-        if not letters:
-            return 0
-        
-        capitals = re.findall(r'[A-Z]', text)
-        return len(capitals) / len(letters) if len(letters) > 0 else 0
+        return char_stats(text).capital_ratio
     
     def get_feature_names(self):
-        return [
-            'email_length',
-            'link_count',
-            'urgent_word_count',
-            'suspicious_keyword_count',
-            'capital_ratio',
-            'exclamation_count',
-            'attachment_keyword_count'
-        ]
\ No newline at end of file
+        return list(self.FEATURE_NAMES)
\ No newline at end of file
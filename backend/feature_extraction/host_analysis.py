@@ -0,0 +1,200 @@
+"""
+Host Analysis
+Registrable domain, subdomain depth and IP-literal detection for URL
+hosts, backed by the bundled public suffix list (data/public_suffix_list.dat,
+from https://publicsuffix.org/list/, MPL 2.0)
+"""
+
+import ipaddress
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+PUBLIC_SUFFIX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'public_suffix_list.dat')
+
+HostInfo = namedtuple('HostInfo', [
+    'host',                 # lowercased host, no port/userinfo/brackets/trailing dot
+    'ip_version',           # 4 or 6 for IP literals, else 0
+    'public_suffix',        # e.g. 'co.uk' (None for IPs and empty hosts)
+    'registrable_domain',   # e.g. 'example.co.uk' (None if the host is a suffix itself)
+    'subdomain_depth'       # labels left of the registrable domain
+])
+
+EMPTY_HOST = HostInfo('', 0, None, None, 0)
+
+# Longest DNS name; longer hosts are analyzed without the memo (its entry
+# count is capped, but a key can be megabytes long)
+MAX_CACHED_HOST = 253
+
+def _idna(label):
+    """ASCII (punycode) form of a rule label, or None if it has none"""
+    try:
+        return label.encode('idna').decode('ascii')
+    except UnicodeError:
+        return None
+
+@lru_cache(maxsize=None)
+def load_public_suffix_trie(path=PUBLIC_SUFFIX_PATH):
+    """
+    Compile the list into a trie of reversed labels ('uk' -> 'co' -> ...)
+    Node keys: child labels, '*' for wildcards, '' marks a rule ending
+    there, '!' holds the exception labels below the node
+    Non-ASCII rules are added in both Unicode and punycode form
+    """
+    root = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            rule = line.split(None, 1)[0] if line.strip() else ''
+            if not rule or rule.startswith('//'):
+                continue
+
+            exception = rule.startswith('!')
+            labels = rule.lstrip('!').lower().split('.')
+            variants = [labels]
+            if not rule.isascii():
+                ascii_labels = [_idna(label) if not label.isascii() else label for label in labels]
+                if None not in ascii_labels:
+                    variants.append(ascii_labels)
+
+            for variant in variants:
+                node = root
+                reversed_labels = variant[::-1]
+                if exception:
+                    for label in reversed_labels[:-1]:
+                        node = node.setdefault(label, {})
+                    node.setdefault('!', set()).add(reversed_labels[-1])
+                else:
+                    for label in reversed_labels:
+                        node = node.setdefault(label, {})
+                    node[''] = True
+    return root
+
+def _suffix_length(node, labels, i):
+    """Labels in the longest rule matching labels[i:] below node (-1: none)"""
+    best = i if node.get('') else -1
+    if i == len(labels):
+        return best
+    label = labels[i]
+    if label in node.get('!', ()):
+        # Exception rules win: the suffix stops at this node
+        return i
+    for key in (label, '*'):
+        child = node.get(key)
+        # Empty or '!' labels (a..b) would hit the marker keys, not a child
+        if isinstance(child, dict):
+            best = max(best, _suffix_length(child, labels, i + 1))
+    return best
+
+def _ipv4_number(part):
+    """Value of one IPv4 part in decimal, 0x-hex or 0-octal (WHATWG), or None"""
+    if part[:2] in ('0x', '0X'):
+        digits, base = part[2:], 16
+    elif len(part) > 1 and part[0] == '0':
+        digits, base = part[1:], 8
+    else:
+        digits, base = part, 10
+    if not digits:
+        return 0 if base == 16 else None
+    try:
+        return int(digits, base) if digits.isascii() and digits.isalnum() else None
+    except ValueError:
+        return None
+
+def parse_ipv4(host):
+    """
+    IPv4 address of a host in any form browsers accept (192.168.0.1,
+    3232235521, 0xc0a80001, 0300.0250.0.1, 192.168.1) as an int, or None
+    """
+    parts = host.split('.')
+    if len(parts) > 1 and parts[-1] == '':
+        parts.pop()
+    if not parts or len(parts) > 4:
+        return None
+
+    numbers = []
+    for part in parts:
+        number = _ipv4_number(part)
+        if number is None:
+            return None
+        numbers.append(number)
+
+    if any(number > 255 for number in numbers[:-1]) or numbers[-1] >= 256 ** (5 - len(numbers)):
+        return None
+    address = numbers[-1]
+    for i, number in enumerate(numbers[:-1]):
+        address += number << (8 * (3 - i))
+    return address
+
+def authority_end(url):
+    """
+    Index where the authority (userinfo@host:port) of a URL ends: the
+    first '/', '?' or '#' after '://', or len(url)
+    Returns (start, end) of the authority
+    """
+    start = url.find('://')
+    start = start + 3 if start != -1 else 0
+    end = len(url)
+    for delimiter in '/?#':
+        index = url.find(delimiter, start, end)
+        if index != -1:
+            end = index
+    return start, end
+
+def host_of(url):
+    """Lowercased host of a URL, without userinfo, port, brackets or trailing dot"""
+    start, end = authority_end(url)
+    host = url[start:end].rpartition('@')[2]
+    if host.startswith('['):
+        close = host.find(']')
+        host = host[1:close] if close != -1 else host[1:]
+    else:
+        host = host.partition(':')[0]
+    return host.rstrip('.').lower()
+
+class HostAnalyzer:
+    """
+    One lookup per host: IP literal? public suffix, registrable domain,
+    subdomain depth. Results are memoized per host in an LRU cache since
+    the same hosts come back again and again
+    """
+
+    def __init__(self, suffix_path=PUBLIC_SUFFIX_PATH, cache_size=8192):
+        self.trie = load_public_suffix_trie(suffix_path)
+        self._cached_analyze = lru_cache(maxsize=cache_size)(self._analyze)
+
+    def analyze(self, host):
+        """Memoized _analyze() (hosts up to MAX_CACHED_HOST chars)"""
+        if len(host) > MAX_CACHED_HOST:
+            return self._analyze(host)
+        return self._cached_analyze(host)
+
+    def _analyze(self, host):
+        """HostInfo for an already extracted, lowercased host"""
+        if not host:
+            return EMPTY_HOST
+
+        if ':' in host:
+            try:
+                ipaddress.IPv6Address(host)
+                return HostInfo(host, 6, None, None, 0)
+            except ValueError:
+                pass
+        last = host.rstrip('.').rpartition('.')[2]
+        if last[:1].isdigit() and parse_ipv4(host) is not None:
+            return HostInfo(host, 4, None, None, 0)
+
+        labels = host.split('.')
+        reversed_labels = labels[::-1]
+        # Unlisted TLDs are public suffixes too (the implicit '*' rule)
+        suffix_length = max(1, _suffix_length(self.trie, reversed_labels, 0))
+        public_suffix = '.'.join(labels[-suffix_length:])
+        if len(labels) <= suffix_length:
+            return HostInfo(host, 0, public_suffix, None, 0)
+        registrable_domain = '.'.join(labels[-suffix_length - 1:])
+        return HostInfo(host, 0, public_suffix, registrable_domain, len(labels) - suffix_length - 1)
+
+    def analyze_url(self, url):
+        return self.analyze(host_of(url))
+
+    def cache_info(self):
+        return self._cached_analyze.cache_info()
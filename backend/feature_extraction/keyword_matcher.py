@@ -0,0 +1,137 @@
+"""
+Multi-Keyword Matcher
+Finds which keywords of several lists occur in a text, shared by the
+URL and email extractors
+"""
+
+import re
+
+def _trie_pattern(node):
+    """
+    Regex for a trie node, factored by common prefix so the regex engine
+    walks the trie instead of trying each keyword in turn
+    A node is a dict of char -> child; '' marks the end of a keyword
+    """
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # A keyword ends here; the greedy '?' still prefers the longer one
+        return '(?:' + body + ')?'
+    return body
+
+class KeywordMatcher:
+    """
+    Keyword lists built once into one matcher
+
+    match(text) returns the set of keywords occurring in the text (as
+    substrings, exactly like `keyword in text`), for every list at once.
+
+    Large vocabularies are matched with one findall() of a trie-shaped
+    regex compiled at construction: wrapped in a lookahead, it reports the
+    longest keyword starting at every position (overlaps included), and
+    the keywords contained in each one are added from a precomputed table.
+    Below AUTOMATON_MIN_KEYWORDS one C substring search per keyword is
+    faster than the regex engine's per-position work, so small
+    vocabularies use that instead (see benchmarks/extractor_bench.py).
+    """
+    AUTOMATON_MIN_KEYWORDS = 100
+
+    def __init__(self, groups, use_automaton=None):
+        for words in groups.values():
+            if not all(words):
+                raise ValueError("Keywords must be non-empty")
+        self.groups = {name: tuple(dict.fromkeys(words)) for name, words in groups.items()}
+        self.keywords = tuple(dict.fromkeys(word for words in self.groups.values() for word in words))
+
+        if use_automaton is None:
+            use_automaton = len(self.keywords) >= self.AUTOMATON_MIN_KEYWORDS
+        self.use_automaton = use_automaton and bool(self.keywords)
+
+        # Keyword -> every keyword it contains (itself included)
+        self._implied = {
+            word: frozenset(other for other in self.keywords if other in word)
+            for word in self.keywords
+        }
+        self.max_length = max(map(len, self.keywords), default=0)
+
+        trie = {}
+        for word in self.keywords:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        body = _trie_pattern(trie)
+        self.pattern = re.compile(body)
+        # Zero-width, so findall() tries every position, not only the
+        # positions after the previous hit
+        self._all_starts = re.compile('(?=(' + body + '))')
+
+    def match(self, text, found=frozenset()):
+        """
+        Set of keywords occurring in text
+        found: keywords already seen (e.g. in earlier chunks), included in
+        the result
+        """
+        if not self.use_automaton:
+            if not found:
+                return set(filter(text.__contains__, self.keywords))
+            return set(found).union(
+                word for word in self.keywords if word not in found and word in text
+            )
+
+        result = set(found)
+        for word in set(self._all_starts.findall(text)):
+            result |= self._implied[word]
+        return result
+
+    def search(self, text):
+        """Some keyword occurring in text, or None (stops at the first hit)"""
+        if not self.use_automaton:
+            for word in self.keywords:
+                if word in text:
+                    return word
+            return None
+        m = self.pattern.search(text)
+        return m.group() if m else None
+
+    def match_chunks(self, chunks):
+        """
+        match() over consecutive chunks of one text, as if joined
+        Each chunk is searched with the end of the previous one in front,
+        so keywords straddling a boundary are found
+        """
+        found = set()
+        overlap = self.max_length - 1
+        tail = ''
+        for chunk in chunks:
+            window = tail + chunk
+            if len(found) < len(self.keywords):
+                found = self.match(window, found)
+            tail = window[-overlap:] if overlap > 0 else ''
+        return found
+
+    def search_chunks(self, chunks):
+        """
+        search() over consecutive chunks of one text, as if joined
+        Stops pulling chunks at the first hit, so a lazy chunk iterator is
+        only consumed as far as needed
+        """
+        overlap = self.max_length - 1
+        tail = ''
+        for chunk in chunks:
+            window = tail + chunk
+            word = self.search(window)
+            if word is not None:
+                return word
+            tail = window[-overlap:] if overlap > 0 else ''
+        return None
+    
+    def counts(self, text):
+        """Number of distinct keywords of each list occurring in text"""
+        return self.group_counts(self.match(text))
+
+    def group_counts(self, found):
+        """Number of distinct keywords of each list in a match() result"""
+        return {name: len(found.intersection(words)) for name, words in self.groups.items()}
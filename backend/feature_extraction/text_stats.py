@@ -0,0 +1,64 @@
+"""
+Chunked Text Statistics
+Character counts over long texts without per-character lists or a full
+copy of the text
+"""
+
+import numpy as np
+
+# Characters handled per step; bounds the temporary copies to this size
+CHUNK_SIZE = 1 << 16
+
+def iter_chunks(parts, size=CHUNK_SIZE, limit=None):
+    """
+    Slices of at most `size` characters of the concatenation of parts,
+    without building the concatenation
+    limit: stop after this many characters in total (None: no limit)
+    """
+    remaining = limit
+    for part in parts:
+        end = len(part) if remaining is None else min(len(part), remaining)
+        for start in range(0, end, size):
+            yield part[start:min(start + size, end)]
+        if remaining is not None:
+            remaining -= end
+            if remaining <= 0:
+                return
+
+class CharStats:
+    """
+    Running letter / capital / '!' / length counts
+    Letters and capitals are ASCII only, like [a-zA-Z] and [A-Z]
+    """
+    __slots__ = ('length', 'letters', 'capitals', 'exclamations')
+
+    def __init__(self):
+        self.length = 0
+        self.letters = 0
+        self.capitals = 0
+        self.exclamations = 0
+
+    def update(self, chunk):
+        """Add one chunk of text (one pass: a byte histogram)"""
+        self.length += len(chunk)
+        # Non-ASCII characters can't be [a-zA-Z] or '!', so drop them
+        counts = np.bincount(
+            np.frombuffer(chunk.encode('ascii', 'ignore'), dtype=np.uint8),
+            minlength=128
+        )
+        capitals = int(counts[65:91].sum())
+        self.capitals += capitals
+        self.letters += capitals + int(counts[97:123].sum())
+        self.exclamations += int(counts[33])
+        return self
+
+    @property
+    def capital_ratio(self):
+        return self.capitals / self.letters if self.letters else 0
+
+def char_stats(*parts, limit=None):
+    """CharStats of the concatenation of parts (of its first `limit` characters)"""
+    stats = CharStats()
+    for chunk in iter_chunks(parts, limit=limit):
+        stats.update(chunk)
+    return stats
@@ -1,15 +1,49 @@
 """
 URL Feature Extraction Module
-Matches EXACTLY with your urlFeatures.js + contentScript.js URL rules
+Matches EXACTLY with your urlFeatures.js + contentScript.js URL rules,
+except has_ip and subdomain_count, which come from the host itself
+(host_analysis.py): IP literals in any form, and labels left of the
+registrable domain per the public suffix list
 """
 
 import re
-import math
-from urllib.parse import urlparse
+from functools import lru_cache
 import numpy as np
 
+from .keyword_matcher import KeywordMatcher
+from .host_analysis import HostAnalyzer, host_of, authority_end
+from .text_stats import iter_chunks
+
+SPECIAL_CHARS = '-_?=&'
+
+# Longer authorities are analyzed without the memo: its entry count is
+# capped, but a key can be megabytes long
+MAX_CACHED_AUTHORITY = 256
+
+def _any_of(words):
+    """Regex matching wherever any of words occurs"""
+    return re.compile('|'.join(map(re.escape, words)))
+
 class URLFeatureExtractor:
-    def __init__(self):
+    # Model input order
+    FEATURE_NAMES = (
+        'url_length',
+        'has_ip',
+        'has_at_symbol',
+        'subdomain_count',
+        'is_https',
+        'special_char_count',
+        'has_suspicious_keyword',
+        'has_login_verify',
+        'has_too_many_links',
+        'has_urgent_words'
+    )
+    NUM_FEATURES = len(FEATURE_NAMES)
+    
+    def __init__(self, max_scan_chars=None, host_cache_size=8192):
+        # Only this many characters of page_text are looked at (None: all)
+        self.max_scan_chars = max_scan_chars
+        
         # From urlFeatures.js
         self.suspicious_keywords = [
             'login', 'verify', 'update', 'bank', 'secure', 'account'
@@ -18,108 +52,223 @@ class URLFeatureExtractor:
         # From contentScript.js URL rules
         self.urgent_words = ['urgent', 'verify', 'suspend', 'limited time', 'click now']
         
-    def extract_features(self, url, page_text="", links_count=0):
+        # One scan of the URL finds the hits of both URL keyword lists
+        self.url_keywords = KeywordMatcher({
+            'suspicious': self.suspicious_keywords,
+            'login_verify': ['login', 'verify']
+        })
+        self.urgent_keywords = KeywordMatcher({'urgent': self.urgent_words})
+        
+        # Suffix list trie + per-host memo (hosts repeat a lot)
+        self.hosts = HostAnalyzer()
+        # Everything derived from the part before the path is memoized per
+        # authority; URL keywords can be split there as long as none of
+        # them contains a path / query / fragment delimiter
+        self._cached_authority_features = lru_cache(maxsize=host_cache_size)(self._authority_features)
+        self._split_keywords = not any(
+            delimiter in word for word in self.url_keywords.keywords for delimiter in '/?#'
+        )
+        
+    def page_context_features(self, page_text="", links_count=0):
         """
-        Extract all features from URL and page context
-        Matches both urlFeatures.js and contentScript.js URL detection
+        Features that depend only on the page, not the URL
+        Returns (has_too_many_links, has_urgent_words)
+        """
+        return (
+            1 if (links_count or 0) > 50 else 0,
+            self._has_urgent_words(page_text or '')
+        )
+    
+    def compute_features(self, url, page_text="", links_count=0, page_context=None):
+        """
+        Single extraction pass over URL and page context
+        Returns feature values as a tuple in FEATURE_NAMES order
+        page_context: precomputed page_context_features() result, if any
         """
         url = str(url).lower().strip()
+        if page_context is None:
+            page_context = self.page_context_features(page_text, links_count)
         
         # Add protocol if missing for parsing
         url_with_protocol = url
         if not url.startswith(('http://', 'https://')):
             url_with_protocol = 'http://' + url
         
-        features = {
+        # Split after the authority: its features come from the cache, only
+        # the path / query / fragment is looked at per URL
+        _, end = authority_end(url_with_protocol)
+        split = end - (len(url_with_protocol) - len(url))
+        rest = url[split:]
+        has_ip, subdomains, authority_special, authority_keywords = self.authority_features(url[:split])
+        if self._split_keywords:
+            keywords = self.url_keywords.match(rest, found=authority_keywords)
+        else:
+            keywords = self.url_keywords.match(url)
+        
+        return (
             # From urlFeatures.js
-            'url_length': self._get_url_length(url),
-            'has_ip': self._has_ip_address(url),
-            'has_at_symbol': self._has_at_symbol(url),
-            'subdomain_count': self._count_subdomains(url_with_protocol),
-            'is_https': self._is_https(url),
-            'special_char_count': self._count_special_chars(url),
-            'has_suspicious_keyword': self._has_suspicious_keyword(url),
+            self._get_url_length(url),
+            has_ip,
+            self._has_at_symbol(url),
+            subdomains,
+            self._is_https(url),
+            authority_special + self._count_special_chars(rest),
+            self._has_suspicious_keyword(keywords),
             
             # From contentScript.js URL rules
-            'has_login_verify': self._has_login_verify(url),
-            'has_too_many_links': 1 if links_count > 50 else 0,
-            'has_urgent_words': self._has_urgent_words(page_text)
+            self._has_login_verify(keywords),
+            *page_context
+        )
+    
+    def authority_features(self, authority):
+        """Memoized _authority_features() (authorities up to MAX_CACHED_AUTHORITY chars)"""
+        if len(authority) > MAX_CACHED_AUTHORITY:
+            return self._authority_features(authority)
+        return self._cached_authority_features(authority)
+    
+    def _authority_features(self, authority):
+        """
+        (has_ip, subdomain_count, special chars, URL keywords) of the part
+        of a lowercased URL before its path, e.g. 'https://user@a.b.co.uk:8080'
+        """
+        host_url = authority
+        if not authority.startswith(('http://', 'https://')):
+            host_url = 'http://' + authority
+        host = self.hosts.analyze(host_of(host_url))
+        return (
+            self._has_ip_address(host),
+            self._count_subdomains(host),
+            self._count_special_chars(authority),
+            frozenset(self.url_keywords.match(authority))
+        )
+    
+    def cache_info(self):
+        """Hit / miss counts of the authority and host memos"""
+        return {
+            'authority': self._cached_authority_features.cache_info()._asdict(),
+            'host': self.hosts.cache_info()._asdict()
         }
-        
-        return features
+    
+    def extract_features(self, url, page_text="", links_count=0):
+        """
+        Extract all features from URL and page context
+        Matches both urlFeatures.js and contentScript.js URL detection
+        """
+        return dict(zip(self.FEATURE_NAMES, self.compute_features(url, page_text, links_count)))
+    
+    def extract_features_into(self, out, url, page_text="", links_count=0, page_context=None):
+        """
+        Fill a preallocated row (e.g. one row of a batch buffer) with features
+        Returns the row so it can be passed straight to the model
+        """
+        out[:] = self.compute_features(url, page_text, links_count, page_context)
+        return out
     
     def extract_features_array(self, url, page_text="", links_count=0):
-        """Extract features as array for model input"""
-        features = self.extract_features(url, page_text, links_count)
-        return np.array([
-            features['url_length'],
-            features['has_ip'],
-            features['has_at_symbol'],
-            features['subdomain_count'],
-            features['is_https'],
-            features['special_char_count'],
-            features['has_suspicious_keyword'],
-            features['has_login_verify'],
-            features['has_too_many_links'],
-            features['has_urgent_words']
-        ])
+        """Extract features as float32 array for model input"""
+        out = np.empty(self.NUM_FEATURES, dtype=np.float32)
+        return self.extract_features_into(out, url, page_text, links_count)
+    
+    def extract_features_batch(self, urls, page_texts=None, links_counts=None):
+        """
+        Feature matrix (n, NUM_FEATURES) float32 for whole columns at once
+        urls, page_texts, links_counts: Series / arrays / lists of equal length
+        Bit-identical to extract_features_array() row by row
+        """
+        import pandas as pd  # only batch callers (training) pay for pandas
+        
+        urls = pd.Series(urls, dtype=object).reset_index(drop=True)
+        n = len(urls)
+        url = urls.map(str).str.lower().str.strip()
+        
+        if page_texts is None:
+            page_texts = [''] * n
+        page_text = pd.Series(page_texts, dtype=object).reset_index(drop=True).fillna('').astype(str)
+        
+        if links_counts is None:
+            links_counts = np.zeros(n)
+        links_count = pd.to_numeric(pd.Series(links_counts).reset_index(drop=True), errors='coerce')
+        
+        out = np.empty((n, self.NUM_FEATURES), dtype=np.float32)
+        if n == 0:
+            return out
+        
+        columns = self._url_columns(url)
+        columns['has_too_many_links'] = (links_count > 50).to_numpy()
+        columns['has_urgent_words'] = page_text.str.lower().str.contains(
+            _any_of(self.urgent_words), regex=True
+        ).to_numpy(dtype=bool)
+        
+        for i, name in enumerate(self.FEATURE_NAMES):
+            out[:, i] = columns[name]
+        return out
+    
+    def _url_columns(self, url):
+        """URL feature columns of a lowercased, stripped url Series"""
+        def contains(pattern, regex=False):
+            return url.str.contains(pattern, regex=regex).to_numpy(dtype=bool)
+        
+        columns = {
+            'url_length': url.str.len().to_numpy(),
+            'has_at_symbol': contains('@'),
+            'is_https': url.str.startswith('https').to_numpy(dtype=bool),
+            # One pass per column: a character class / keyword alternation
+            'special_char_count': url.str.count('[' + re.escape(SPECIAL_CHARS) + ']').to_numpy(),
+            'has_suspicious_keyword': contains(_any_of(self.suspicious_keywords), regex=True),
+            'has_login_verify': contains(_any_of(['login', 'verify']), regex=True),
+        }
+        columns.update(self._host_columns(url))
+        return columns
+    
+    def _host_columns(self, url):
+        """
+        has_ip / subdomain_count columns of a url Series
+        Each distinct host is analyzed once
+        """
+        with_protocol = url.where(url.str.startswith(('http://', 'https://')), 'http://' + url)
+        hosts = with_protocol.map(host_of)
+        info = {host: self.hosts.analyze(host) for host in hosts.unique()}
+        return {
+            'has_ip': hosts.map(lambda host: self._has_ip_address(info[host])).to_numpy(dtype=bool),
+            'subdomain_count': hosts.map(lambda host: self._count_subdomains(info[host])).to_numpy(dtype=np.int64),
+        }
+    
+    def features_to_dict(self, row):
+        """Build the feature dict from an already extracted row"""
+        return {name: int(value) for name, value in zip(self.FEATURE_NAMES, row)}
     
     def _get_url_length(self, url):
         return len(url)
     
-    def _has_ip_address(self, url):
-        # Check for IPv4 pattern
-        ip_pattern = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
-        return 1 if re.search(ip_pattern, url) else 0
+    def _has_ip_address(self, host):
+        # host: HostInfo; IPv4 (incl. integer / hex / octal forms) or IPv6 literal
+        return 1 if host.ip_version else 0
     
     def _has_at_symbol(self, url):
         return 1 if '@' in url else 0
     
-    def _count_subdomains(self, url):
-        try:
-            parsed = urlparse(url)
-            hostname = parsed.hostname or ''
-            parts = hostname.split('.')
-            # subdomain count = total parts - 2 (domain + TLD)
-            return max(0, len(parts) - 2)
-        except:
-            return 0
+    def _count_subdomains(self, host):
+        # Labels left of the registrable domain: 0 for example.co.uk, 1 for a.example.co.uk
+        return host.subdomain_depth
     
     def _is_https(self, url):
         return 1 if url.startswith('https') else 0
     
     def _count_special_chars(self, url):
-        special_chars = re.findall(r'[-_?=&]', url)
-        return len(special_chars)
+        return sum(map(url.count, SPECIAL_CHARS))
     
-    def _has_suspicious_keyword(self, url):
-        url_lower = url.lower()
-        for keyword in self.suspicious_keywords:
-            if keyword in url_lower:
-                return 1
-        return 0
+    def _has_suspicious_keyword(self, keywords):
+        # keywords: url_keywords.match() of the already lowercased URL
+        return 0 if keywords.isdisjoint(self.suspicious_keywords) else 1
     
-    def _has_login_verify(self, url):
-        url_lower = url.lower()
-        return 1 if ('login' in url_lower or 'verify' in url_lower) else 0
+    def _has_login_verify(self, keywords):
+        return 1 if ('login' in keywords or 'verify' in keywords) else 0
     
     def _has_urgent_words(self, text):
-        text_lower = text.lower()
-        for word in self.urgent_words:
-            if word in text_lower:
-                return 1
-        return 0
+        # Lowercased chunk by chunk, up to the first hit: neither a huge
+        # page nor its lowercased copy is ever processed as a whole
+        chunks = (chunk.lower() for chunk in iter_chunks((text,), limit=self.max_scan_chars))
+        return 1 if self.urgent_keywords.search_chunks(chunks) is not None else 0
     
     def get_feature_names(self):
-        return [
-            'url_length',
-            'has_ip',
-            'has_at_symbol',
-            'subdomain_count',
-            'is_https',
-            'special_char_count',
-            'has_suspicious_keyword',
-            'has_login_verify',
-            'has_too_many_links',
-            'has_urgent_words'
-        ]
\ No newline at end of file
+        return list(self.FEATURE_NAMES)
\ No newline at end of file
@@ -11,6 +11,18 @@ class URLPredictRequest(BaseModel):
     page_text: Optional[str] = ""
     links_count: Optional[int] = 0
     return_features: Optional[bool] = False
+    latency_budget_ms: Optional[float] = None  # overrides X-Latency-Budget-Ms
+
+class URLBatchItem(BaseModel):
+    """Single URL entry inside a batch prediction request"""
+    url: str
+    page_text: Optional[str] = ""
+    links_count: Optional[int] = 0
+
+class URLBatchPredictRequest(BaseModel):
+    """Request schema for batch URL prediction"""
+    urls: List[URLBatchItem]
+    return_features: Optional[bool] = False
 
 class EmailPredictRequest(BaseModel):
     """Request schema for Email prediction"""
@@ -18,11 +30,15 @@ class EmailPredictRequest(BaseModel):
     body: str = ""
     links: Optional[List[str]] = []
     return_features: Optional[bool] = False
+    score_links: Optional[bool] = False  # also score each link with the URL model
+    latency_budget_ms: Optional[float] = None  # overrides X-Latency-Budget-Ms
 
 class HealthResponse(BaseModel):
     status: str
     version: str
+    ready: bool = True
     models_loaded: dict
+    startup: Optional[dict] = None
     timestamp: str
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,226 @@
+"""
+PhishGuard Pre-Fork Server
+Production entry point: the master loads the models once, binds the port
+and forks the workers, which share the model pages copy-on-write and one
+shared-memory prediction cache
+
+    python serve.py --workers 4 --port 8080
+
+Signals to the master: SIGHUP reloads the models and the domain index and
+replaces the workers (POST /admin/reload sends it); SIGTERM / SIGINT stop.
+Request metrics (/metrics) are kept per worker.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from utils.config import get_config
+
+# Seconds between master checks (dead workers, reload requests)
+MASTER_TICK = 0.5
+# Seconds stopping workers get to finish before they are killed
+GRACEFUL_TIMEOUT = 10
+
+logger = logging.getLogger(__name__)
+
+class PreforkServer:
+    """Master process: forks, watches and replaces the workers"""
+
+    def __init__(self, api, server, workers, watch_interval=0):
+        self.api = api
+        self.server = server
+        self.num_workers = workers
+        self.workers = set()
+        # Workers of the previous model finishing their requests: pid ->
+        # time.monotonic() after which they are killed
+        self.retiring = {}
+        self.reload_requested = False
+        self.stopping = False
+
+        self.watcher = None
+        if watch_interval > 0:
+            # Polled from the master loop: a watcher thread must not be
+            # running while the master forks
+            self.watcher = api.ModelWatcher({
+                'url': [api.config.URL_MODEL_PATH, api.config.URL_METADATA_PATH, api.config.URL_ARTIFACT_PATH],
+                'email': [api.config.EMAIL_MODEL_PATH, api.config.EMAIL_METADATA_PATH, api.config.EMAIL_ARTIFACT_PATH]
+            }, api.reload_model, interval=watch_interval)
+            api.model_watcher = self.watcher
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self.workers.add(pid)
+        return pid
+
+    def _run_worker(self):
+        """Serve until SIGTERM; never returns"""
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        # Ctrl-C reaches the whole process group; the master stops us
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(
+            target=self.server.shutdown, daemon=True).start())
+        # Werkzeug's request threads are daemonic, so server_close() (run
+        # when serve_forever() returns) would not wait for them and exiting
+        # would cut off requests in flight; the master enforces the deadline
+        self.server.daemon_threads = False
+
+        code = 0
+        try:
+            self.server.serve_forever()
+        except Exception as e:
+            logger.error(f"❌ Worker {os.getpid()} crashed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def fork_workers(self):
+        """Start a full set of workers from the current models"""
+        # Move everything loaded so far out of the collector's reach, so
+        # collections in the workers don't write to (and copy) shared pages
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+        logger.info(f"🚀 {self.num_workers} workers serving (pids {sorted(self.workers)})")
+
+    def replace_workers(self):
+        """Fork new workers, then let the old ones finish and exit"""
+        old = self.workers
+        self.workers = set()
+        self.fork_workers()
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+            self.retiring[pid] = deadline
+
+    def reload(self):
+        """Reload models and domain index in the master, then re-fork"""
+        self.reload_requested = False
+        gc.unfreeze()
+        for model_type in ('url', 'email'):
+            try:
+                self.api.reload_model(model_type)
+            except Exception as e:
+                # The current model stays in place
+                logger.error(f"❌ Reload of {model_type} model failed: {e}")
+        try:
+            self.api.domain_index = self.api.load_domain_index()
+        except Exception as e:
+            logger.error(f"❌ Failed to rebuild domain index: {e}")
+        self.replace_workers()
+
+    def reap(self):
+        """Collect exited workers; replace the ones that died unexpectedly"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            if pid in self.retiring:
+                del self.retiring[pid]
+                if not self.retiring:
+                    # Old workers may have cached old-model results after
+                    # the reload cleared the cache
+                    self.api.url_prediction_cache.clear()
+            elif pid in self.workers:
+                self.workers.discard(pid)
+                if not self.stopping:
+                    logger.error(f"❌ Worker {pid} exited ({status}), starting a new one")
+                    self.spawn_worker()
+
+    def kill_overdue(self):
+        """SIGKILL retiring workers still busy past their deadline"""
+        now = time.monotonic()
+        for pid, deadline in self.retiring.items():
+            if now >= deadline:
+                logger.error(f"❌ Worker {pid} did not finish within {GRACEFUL_TIMEOUT}s, killing it")
+                self._signal(pid, signal.SIGKILL)
+
+    def stop(self):
+        """SIGTERM every worker, SIGKILL the ones still there after GRACEFUL_TIMEOUT"""
+        for pid in self.workers | set(self.retiring):
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while (self.workers or self.retiring) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in self.workers | set(self.retiring):
+            self._signal(pid, signal.SIGKILL)
+        self.server.server_close()
+        logger.info("👋 Server stopped")
+
+    @staticmethod
+    def _signal(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def run(self):
+        def request_reload(*_):
+            self.reload_requested = True
+
+        def request_stop(*_):
+            self.stopping = True
+
+        signal.signal(signal.SIGHUP, request_reload)
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.fork_workers()
+        next_poll = time.monotonic() + (self.watcher.interval if self.watcher else 0)
+        while not self.stopping:
+            time.sleep(MASTER_TICK)
+            self.reap()
+            self.kill_overdue()
+            if self.reload_requested:
+                logger.info("🔄 Reload requested, reloading models...")
+                self.reload()
+            elif self.watcher is not None and time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.watcher.interval
+                gc.unfreeze()
+                if self.watcher.poll():
+                    self.replace_workers()
+                else:
+                    gc.freeze()
+        self.stop()
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Run the PhishGuard API with pre-forked workers")
+    parser.add_argument('--workers', type=int, default=config.SERVER_WORKERS or os.cpu_count() or 1)
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    args = parser.parse_args()
+
+    # Models must be in memory before the fork to be shared, the cache
+    # must live in shared memory, and file watching moves to the master
+    watch_interval = config.MODEL_WATCH_INTERVAL
+    # (app reads the same config class)
+    for name, value in (('MODEL_LOAD_MODE', 'eager'), ('MODEL_WATCH_INTERVAL', 0),
+                        ('SHARED_PREDICTION_CACHE', True)):
+        setattr(config, name, value)
+
+    import app as api
+    from werkzeug.serving import make_server
+
+    server = make_server(args.host, args.port, api.app, threaded=True)
+    api.prefork_master_pid = os.getpid()
+    logger.info(f"🌐 Listening on http://{args.host}:{args.port}")
+    PreforkServer(api, server, max(1, args.workers), watch_interval).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
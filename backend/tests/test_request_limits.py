@@ -0,0 +1,65 @@
+"""
+Request Size Limits
+Bodies over MAX_CONTENT_LENGTH get a 413, whether the length is declared
+or the body arrives chunked (the cap is then hit while reading)
+"""
+
+import io
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import app as api
+
+LIMIT = 1024
+
+JSON_ROUTES = ['/predict/url', '/predict/url/batch', '/predict/email', '/features/url', '/features/email']
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(api.app.config, 'MAX_CONTENT_LENGTH', LIMIT)
+    monkeypatch.setattr(api.config, 'MAX_CONTENT_LENGTH', LIMIT)
+    return api.app.test_client()
+
+def post_chunked(client, path, body, content_type='application/json'):
+    """POST without Content-Length, like a Transfer-Encoding: chunked upload"""
+    return client.post(
+        path,
+        input_stream=io.BytesIO(body),
+        content_type=content_type,
+        headers={'Transfer-Encoding': 'chunked'},
+        environ_overrides={'wsgi.input_terminated': True}
+    )
+
+def oversized_json():
+    return json.dumps({'url': 'http://example.com/' + 'a' * (2 * LIMIT)}).encode('utf-8')
+
+@pytest.mark.parametrize('path', JSON_ROUTES)
+def test_chunked_oversized_body_is_413(client, path):
+    response = post_chunked(client, path, oversized_json())
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Request too large'
+
+@pytest.mark.parametrize('path', JSON_ROUTES)
+def test_declared_oversized_body_is_413(client, path):
+    response = client.post(path, data=oversized_json(), content_type='application/json')
+    assert response.status_code == 413
+
+def test_chunked_oversized_raw_email_is_413(client):
+    raw = b'Subject: hi\r\n\r\n' + b'a' * (2 * LIMIT)
+    response = post_chunked(client, '/predict/email/raw', raw, content_type='message/rfc822')
+    assert response.status_code == 413
+
+def test_chunked_body_under_limit_is_scored(client):
+    body = json.dumps({'url': 'http://example.com/login'}).encode('utf-8')
+    response = post_chunked(client, '/predict/url', body)
+    assert response.status_code in (200, 503)
+    assert response.status_code != 413
+
+def test_malformed_json_is_still_400(client):
+    response = client.post('/predict/url', data=b'{bad', content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+"""
+Export Model Artifacts
+Writes models/*_model.bin for models that were trained before the
+trainers emitted artifacts, from their *_model_metadata.json (tree
+ensembles: from the pickle; no retraining)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+from utils.config import get_config
+from utils.model_artifact import ModelArtifact, write_logistic_artifact, write_tree_ensemble_artifact
+from utils.scoring import TreeEnsembleScorer, NATIVE_SCORERS
+
+def main():
+    config = get_config()
+    models = [
+        ('url', config.URL_METADATA_PATH, config.URL_MODEL_PATH, config.URL_ARTIFACT_PATH),
+        ('email', config.EMAIL_METADATA_PATH, config.EMAIL_MODEL_PATH, config.EMAIL_ARTIFACT_PATH),
+    ]
+    
+    for model_type, metadata_path, model_path, artifact_path in models:
+        if not os.path.exists(metadata_path):
+            print(f"⚠️  {metadata_path} not found, skipping {model_type} model")
+            continue
+        
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        if metadata.get('model_type') == 'GradientBoostingClassifier':
+            # Tree arrays are not in the metadata; flatten the pickled model
+            import joblib
+            scorer = TreeEnsembleScorer.from_sklearn(joblib.load(model_path), metadata.get('feature_names'))
+            write_tree_ensemble_artifact(artifact_path, scorer, metadata)
+        elif metadata.get('model_type') == 'LogisticRegression' and 'coefficients' in metadata:
+            write_logistic_artifact(artifact_path, metadata)
+        else:
+            print(f"⚠️  {model_type} metadata has no model we can export, skipping")
+            continue
+        
+        artifact = ModelArtifact(artifact_path)
+        if os.path.exists(model_path):
+            # The server maps the artifact without comparing it to the pickle
+            import joblib
+            scorer = NATIVE_SCORERS[metadata['model_type']].from_artifact(artifact)
+            scorer.verify_parity(joblib.load(model_path), scorer.n_features)
+        print(f"✅ {model_type} artifact saved to: {artifact_path} (sha256 {artifact.checksum[:16]}...)")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """
 URL Phishing Detection Model Training
-Using Logistic Regression
+Using Logistic Regression or Gradient-Boosted Trees (--model)
 """
 
 import sys
@@ -10,17 +10,28 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pandas as pd
 import numpy as np
 import joblib
+import argparse
 from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.utils.class_weight import compute_sample_weight
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 import json
 from datetime import datetime
 
+from utils.model_artifact import ModelArtifact, write_logistic_artifact, write_tree_ensemble_artifact
+from utils.scoring import TreeEnsembleScorer, NATIVE_SCORERS
 from feature_extraction.url_features import URLFeatureExtractor
+from feature_extraction.parallel_extraction import extract_features_parallel, resolve_workers
+
+# --model choices: 'logistic' (LogisticRegression) or 'gbt' (gradient-boosted trees)
+MODEL_CHOICES = ('logistic', 'gbt')
 
 class URLModelTrainer:
-    def __init__(self):
+    def __init__(self, model_kind='logistic', workers=1):
         self.extractor = URLFeatureExtractor()
+        self.model_kind = model_kind
+        self.workers = resolve_workers(workers)
         self.model = None
         self.feature_names = self.extractor.get_feature_names()
         
@@ -57,46 +68,51 @@ class URLModelTrainer:
         print(f"   Phishing: {phishing_count}")
         print(f"   Legitimate: {legit_count}")
         
-        # Extract features for each URL
-        print("🛠️ Extracting features...")
-        X_list = []
-        
-        for idx, row in df.iterrows():
-            if idx % 1000 == 0 and idx > 0:
-                print(f"   Processed {idx} URLs...")
-            
-            # 🔥 FIX: Convert to string explicitly
-            url = str(row['url']) if pd.notna(row['url']) else ''
-            page_text = str(row['page_text']) if pd.notna(row['page_text']) else ''
-            links_count = int(row['links_count']) if pd.notna(row['links_count']) else 0
-            
-            features = self.extractor.extract_features_array(url, page_text, links_count)
-            X_list.append(features)
-        
-        X = np.array(X_list)
+        # Extract features in row chunks, in parallel with --workers > 1
+        # (same values as per-row extraction)
+        print(f"🛠️ Extracting features ({self.workers} worker{'s' if self.workers > 1 else ''})...")
+        X = extract_features_parallel(
+            URLFeatureExtractor, (df['url'], df['page_text'], df['links_count']), workers=self.workers
+        )
         y = df['label'].values
         
         print(f"✅ Feature matrix shape: {X.shape}")
         return X, y
     
+    def build_model(self):
+        """Untrained estimator for self.model_kind"""
+        if self.model_kind == 'gbt':
+            # Served by the native tree engine (utils/scoring.TreeEnsembleScorer)
+            return GradientBoostingClassifier(
+                n_estimators=100,
+                learning_rate=0.1,
+                max_depth=3,
+                random_state=42
+            )
+        return LogisticRegression(
+            max_iter=1000,
+            random_state=42,
+            class_weight='balanced',
+            solver='lbfgs'
+        )
+    
     def train_model(self, X, y):
-        """Train Logistic Regression model"""
-        print("\n🚀 Training Logistic Regression...")
+        """Train the selected model"""
+        self.model = self.build_model()
+        print(f"\n🚀 Training {type(self.model).__name__}...")
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
         
-        # Create and train model
-        self.model = LogisticRegression(
-            max_iter=1000,
-            random_state=42,
-            class_weight='balanced',
-            solver='lbfgs'
-        )
-        
-        self.model.fit(X_train, y_train)
+        if self.model_kind == 'gbt':
+            # No class_weight on boosting; balance through sample weights
+            self.model.fit(X_train, y_train, sample_weight=compute_sample_weight('balanced', y_train))
+        else:
+            # Fit in float64 (newer sklearn keeps float32 input as float32) so the
+            # saved coefficients reproduce the model's probabilities exactly
+            self.model.fit(X_train.astype(np.float64), y_train)
         
         # Evaluate
         y_pred = self.model.predict(X_test)
@@ -120,11 +136,15 @@ class URLModelTrainer:
         print(f"   TN: {cm[0,0]:4d}  FP: {cm[0,1]:4d}")
         print(f"   FN: {cm[1,0]:4d}  TP: {cm[1,1]:4d}")
         
-        # Feature coefficients
-        coefficients = self.model.coef_[0]
-        print("\n📊 Feature Coefficients:")
-        for name, coef in zip(self.feature_names, coefficients):
-            print(f"   {name:25s}: {coef:.4f}")
+        if self.model_kind == 'gbt':
+            print("\n📊 Feature Importances:")
+            for name, importance in zip(self.feature_names, self.model.feature_importances_):
+                print(f"   {name:25s}: {importance:.4f}")
+        else:
+            coefficients = self.model.coef_[0]
+            print("\n📊 Feature Coefficients:")
+            for name, coef in zip(self.feature_names, coefficients):
+                print(f"   {name:25s}: {coef:.4f}")
         
         metrics = {
             'accuracy': accuracy,
@@ -151,23 +171,53 @@ class URLModelTrainer:
         # Save metadata
         metadata = {
             'training_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'model_type': 'LogisticRegression',
+            'model_type': type(self.model).__name__,
             'feature_names': self.feature_names,
             'num_features': len(self.feature_names),
-            'metrics': metrics,
-            'coefficients': self.model.coef_[0].tolist(),
-            'intercept': self.model.intercept_[0]
+            'metrics': metrics
         }
+        if self.model_kind == 'gbt':
+            metadata.update({
+                'n_estimators': self.model.n_estimators,
+                'learning_rate': self.model.learning_rate,
+                'max_depth': self.model.max_depth,
+                'feature_importances': self.model.feature_importances_.tolist()
+            })
+        else:
+            metadata.update({
+                'coefficients': self.model.coef_[0].tolist(),
+                'intercept': float(self.model.intercept_[0])
+            })
         
         metadata_path = '../models/url_model_metadata.json'
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=4)
         print(f"✅ Metadata saved to: {metadata_path}")
         
+        # Memory-mappable artifact the server prefers over the pickle
+        artifact_path = '../models/url_model.bin'
+        if self.model_kind == 'gbt':
+            scorer = TreeEnsembleScorer.from_sklearn(self.model, self.feature_names)
+            write_tree_ensemble_artifact(artifact_path, scorer, metadata)
+        else:
+            write_logistic_artifact(artifact_path, metadata)
+        # The server maps the artifact without comparing it to the pickle
+        artifact = ModelArtifact(artifact_path)
+        NATIVE_SCORERS[metadata['model_type']].from_artifact(artifact).verify_parity(
+            self.model, len(self.feature_names))
+        print(f"✅ Artifact saved to: {artifact_path} (matches the model)")
+        
         return model_path
 
 def main():
-    trainer = URLModelTrainer()
+    parser = argparse.ArgumentParser(description="Train the url phishing model")
+    parser.add_argument('--model', choices=MODEL_CHOICES, default='logistic',
+                        help="logistic regression or gradient-boosted trees")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="feature extraction processes (0: one per CPU)")
+    args = parser.parse_args()
+    
+    trainer = URLModelTrainer(model_kind=args.model, workers=args.workers)
     
     # Path to your dataset
     dataset_path = '../dataset/url_dataset.csv'
@@ -11,9 +11,25 @@ class Config:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     MODEL_DIR = os.path.join(BASE_DIR, 'models')
     
+    DATASET_DIR = os.path.join(BASE_DIR, 'dataset')
+    
     # Model paths
     URL_MODEL_PATH = os.path.join(MODEL_DIR, 'url_model.pkl')
     EMAIL_MODEL_PATH = os.path.join(MODEL_DIR, 'email_model.pkl')
+    URL_METADATA_PATH = os.path.join(MODEL_DIR, 'url_model_metadata.json')
+    EMAIL_METADATA_PATH = os.path.join(MODEL_DIR, 'email_model_metadata.json')
+    # Memory-mapped artifacts written by the trainers; preferred over the
+    # pickle + metadata pair when present
+    URL_ARTIFACT_PATH = os.path.join(MODEL_DIR, 'url_model.bin')
+    EMAIL_ARTIFACT_PATH = os.path.join(MODEL_DIR, 'email_model.bin')
+    
+    # Inference engine: 'native' scores with numpy engines (logistic
+    # regression, flattened tree ensembles) without sklearn, 'sklearn' calls
+    # the pickled model ('logistic' is accepted as an alias of 'native')
+    INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'native')
+    # Check a native engine built from the JSON metadata against the pickle
+    # at load (imports sklearn); *.bin artifacts are checked when written
+    VERIFY_ENGINE_PARITY = os.getenv('VERIFY_ENGINE_PARITY', '1') == '1'
     
     # Risk thresholds (matching your contentScript.js)
     RISK_THRESHOLDS = {
@@ -27,6 +43,61 @@ class Config:
     API_PORT = 5000
     DEBUG = True
     
+    # Startup: 'eager' loads models at import, 'background' loads them in a
+    # thread while /health reports 503, 'lazy' loads on the first request
+    MODEL_LOAD_MODE = os.getenv('MODEL_LOAD_MODE', 'eager')
+    MODEL_LOAD_TIMEOUT = float(os.getenv('MODEL_LOAD_TIMEOUT', 10))  # seconds a request waits
+    STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 2000))
+    
+    # Hot reload: poll model files every N seconds (0 disables the watcher)
+    MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 0))
+    # Required in X-Admin-Token for /admin/* (unset: admin routes refused)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    # Development only: without a token, trust requests from localhost
+    # (behind a local reverse proxy that is every client)
+    ADMIN_ALLOW_LOCALHOST = os.getenv('ADMIN_ALLOW_LOCALHOST', '0') == '1'
+    
+    # Known-bad / known-good index checked before the URL model
+    # (os.pathsep-separated lists; missing files are skipped)
+    BLOCKLIST_FEEDS = os.getenv('BLOCKLIST_FEEDS', os.pathsep.join([
+        os.path.join(DATASET_DIR, 'phishtank_raw.csv'),
+        os.path.join(DATASET_DIR, 'blocklist.txt')
+    ])).split(os.pathsep)
+    ALLOWLIST_FEEDS = os.getenv('ALLOWLIST_FEEDS', os.path.join(DATASET_DIR, 'allowlist.txt')).split(os.pathsep)
+    BLOOM_THRESHOLD = int(os.getenv('BLOOM_THRESHOLD', 200000))  # feeds above this use a Bloom filter
+    BLOOM_ERROR_RATE = float(os.getenv('BLOOM_ERROR_RATE', 1e-6))
+    
+    # Batch prediction settings
+    MAX_BATCH_SIZE = 1000  # Max URLs accepted by /predict/url/batch
+    
+    # Server-side URL prediction cache (TTL matches background.js)
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 10000))
+    PREDICTION_CACHE_TTL = int(os.getenv('PREDICTION_CACHE_TTL', 300))  # seconds
+    # Keep the cache in shared memory so forked workers share it (serve.py sets this)
+    SHARED_PREDICTION_CACHE = os.getenv('SHARED_PREDICTION_CACHE', '0') == '1'
+    
+    # Pre-fork server (serve.py): workers forked from one master that
+    # loaded the models (0: one per CPU)
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 0))
+    
+    # ASGI micro-batching (asgi.py): coalesce single predictions
+    MICRO_BATCH_MAX_SIZE = int(os.getenv('MICRO_BATCH_MAX_SIZE', 64))
+    MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', 2))
+    
+    # Load shedding: past this many requests in the model path (or when a
+    # request's latency budget would be overrun) answer with the
+    # background.js heuristic score instead, marked degraded (0 disables)
+    LOAD_SHED_MAX_QUEUE_DEPTH = int(os.getenv('LOAD_SHED_MAX_QUEUE_DEPTH', 64))
+    # Budget applied when neither latency_budget_ms nor X-Latency-Budget-Ms is sent (0: none)
+    DEFAULT_LATENCY_BUDGET_MS = float(os.getenv('DEFAULT_LATENCY_BUDGET_MS', 0))
+    
+    # Request size cap (bytes): larger bodies are rejected with 413 before
+    # they are read
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    # Characters of page_text / email text scanned for keywords and
+    # character counts; the rest of a bloated page is ignored (0: no cap)
+    MAX_SCAN_CHARS = int(os.getenv('MAX_SCAN_CHARS', 1024 * 1024)) or None
+    
     # Feature counts
     URL_FEATURE_COUNT = 10  # We have 10 URL features
     EMAIL_FEATURE_COUNT = 7  # We have 7 email features
@@ -36,8 +107,11 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    ADMIN_ALLOW_LOCALHOST = False
     API_HOST = '0.0.0.0'
     API_PORT = 8080
+    VERIFY_ENGINE_PARITY = os.getenv('VERIFY_ENGINE_PARITY', '0') == '1'
+    MODEL_LOAD_MODE = os.getenv('MODEL_LOAD_MODE', 'background')
 
 def get_config():
     env = os.getenv('FLASK_ENV', 'development')
@@ -0,0 +1,207 @@
+"""
+Known-Bad / Known-Good Domain Index
+Exact-match blocklist and allowlist consulted before the URL model
+"""
+
+import csv
+import hashlib
+import logging
+import math
+import os
+import threading
+
+from .prediction_cache import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity, error_rate=1e-6):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+def split_url(url):
+    """
+    Index keys for a URL: (url_key, host)
+    url_key is the canonical URL, lowercased, without scheme or trailing '/'
+    """
+    key = canonicalize_url(url).lower()
+    scheme_end = key.find('://')
+    if scheme_end != -1:
+        key = key[scheme_end + 3:]
+
+    host_end = len(key)
+    for delimiter in '/?#':
+        index = key.find(delimiter)
+        if index != -1 and index < host_end:
+            host_end = index
+    host = key[:host_end].rpartition('@')[2]
+    if host.startswith('['):
+        host = host[1:host.find(']')] if ']' in host else host
+    else:
+        host = host.partition(':')[0]
+
+    return key.rstrip('/'), host.rstrip('.')
+
+def _parent_domains(host):
+    """host itself and every parent domain: a.b.com, b.com, com"""
+    while host:
+        yield host
+        host = host.partition('.')[2]
+
+class DomainIndex:
+    """
+    Blocklist of phishing URLs/hosts and allowlist of trusted domains
+    Feeds larger than bloom_threshold are kept in a Bloom filter instead
+    of an exact set; lookups report which structure matched
+    """
+
+    def __init__(self, bloom_threshold=200000, bloom_error_rate=1e-6):
+        self.bloom_threshold = bloom_threshold
+        self.bloom_error_rate = bloom_error_rate
+        self.blocked_urls = set()
+        self.blocked_hosts = set()
+        self.allowed_hosts = set()
+        self.blocked_blooms = []
+        self.feeds = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_feed(path):
+        """
+        Entries of a feed file: a CSV with a 'url' column (PhishTank format)
+        or plain text with one URL/host per line ('#' starts a comment)
+        """
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            first_line = f.readline()
+            f.seek(0)
+            if path.endswith('.csv') or 'url' in first_line.lower().split(','):
+                for row in csv.DictReader(f):
+                    entry = (row.get('url') or '').strip()
+                    if entry:
+                        yield entry
+            else:
+                for line in f:
+                    entry = line.split('#', 1)[0].strip()
+                    if entry:
+                        yield entry
+
+    def add_blocked(self, entries, use_bloom=False):
+        """
+        Add blocklist entries; entries without scheme or path are hosts
+        Returns the number of entries added
+        """
+        bloom = None
+        if use_bloom:
+            entries = list(entries)
+            bloom = BloomFilter(len(entries), self.bloom_error_rate)
+
+        added = 0
+        with self._lock:
+            for entry in entries:
+                url_key, host = split_url(entry)
+                if url_key == host and '://' not in entry:
+                    self.blocked_hosts.add(host)
+                elif bloom is not None:
+                    bloom.add(url_key)
+                else:
+                    self.blocked_urls.add(url_key)
+                added += 1
+            if bloom is not None and bloom.count:
+                self.blocked_blooms.append(bloom)
+        return added
+
+    def add_allowed(self, entries):
+        """Add trusted domains; subdomains of an entry are trusted too"""
+        added = 0
+        with self._lock:
+            for entry in entries:
+                _, host = split_url(entry)
+                if host:
+                    self.allowed_hosts.add(host)
+                    added += 1
+        return added
+
+    def load_feed(self, path, kind='block'):
+        """
+        Merge a feed file into the index (incremental, no rebuild)
+        kind: 'block' or 'allow'
+        """
+        entries = list(self._read_feed(path))
+        if kind == 'allow':
+            added = self.add_allowed(entries)
+        else:
+            added = self.add_blocked(entries, use_bloom=len(entries) > self.bloom_threshold)
+
+        with self._lock:
+            self.feeds.append({'path': path, 'kind': kind, 'entries': added})
+        logger.info(f"📚 Loaded {added} {kind}list entries from {path}")
+        return added
+
+    def lookup(self, url):
+        """
+        Check a URL against the index
+        Returns None, or {'source': 'blocklist'|'allowlist', 'match': ...}
+        where match is 'url', 'host' or 'bloom' (probabilistic)
+        """
+        url_key, host = split_url(url)
+
+        if url_key in self.blocked_urls:
+            return {'source': 'blocklist', 'match': 'url'}
+        for domain in _parent_domains(host):
+            if domain in self.blocked_hosts:
+                return {'source': 'blocklist', 'match': 'host'}
+        for bloom in self.blocked_blooms:
+            if url_key in bloom:
+                return {'source': 'blocklist', 'match': 'bloom'}
+        for domain in _parent_domains(host):
+            if domain in self.allowed_hosts:
+                return {'source': 'allowlist', 'match': 'host'}
+        return None
+
+    def __len__(self):
+        return (
+            len(self.blocked_urls) + len(self.blocked_hosts) + len(self.allowed_hosts)
+            + sum(bloom.count for bloom in self.blocked_blooms)
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'blocked_urls': len(self.blocked_urls),
+                'blocked_hosts': len(self.blocked_hosts),
+                'blocked_bloom_entries': sum(bloom.count for bloom in self.blocked_blooms),
+                'allowed_hosts': len(self.allowed_hosts),
+                'feeds': list(self.feeds)
+            }
+
+def build_domain_index(block_feeds=(), allow_feeds=(), **kwargs):
+    """Build an index from the feed files that exist (missing ones are skipped)"""
+    index = DomainIndex(**kwargs)
+    for kind, paths in (('block', block_feeds), ('allow', allow_feeds)):
+        for path in paths:
+            if os.path.exists(path):
+                try:
+                    index.load_feed(path, kind)
+                except Exception as e:
+                    logger.error(f"❌ Failed to load {kind}list feed {path}: {e}")
+    return index
@@ -0,0 +1,64 @@
+"""
+Rule-Based Heuristic Scores
+Port of calculateHeuristicScore from frontend/background/background.js,
+used as a cheap fallback when the server sheds load
+"""
+
+import re
+from urllib.parse import urlparse
+
+# Same pattern as background.js (unanchored, like RegExp.test)
+IP_PATTERN = re.compile(r'(\d{1,3}\.){3}\d{1,3}')
+
+SUSPICIOUS_WORDS = ('urgent', 'verify', 'suspend', 'limited time', 'click now')
+
+def url_rule_score(url):
+    """URL-only rules of calculateHeuristicScore (case-sensitive, like the JS)"""
+    score = 0
+    if '@' in url:
+        score += 20
+    if 'login' in url or 'verify' in url:
+        score += 15
+    if len(url) > 75:
+        score += 10
+    if IP_PATTERN.search(url):
+        score += 25
+
+    # new URL(url) throws for scheme-less input, which adds nothing
+    if '://' in url:
+        try:
+            hostname = urlparse(url).hostname or ''
+        except ValueError:
+            hostname = ''
+        if len(hostname.split('.')) - 2 > 2:
+            score += 10
+    return score
+
+def text_rule_score(page_text, links_count, max_chars=None):
+    """
+    Page text and link count rules of calculateHeuristicScore
+    max_chars: only look at the start of the text (None: all of it)
+    """
+    score = 0
+    if page_text:
+        text = page_text[:max_chars].lower()
+        score += 10 * sum(1 for word in SUSPICIOUS_WORDS if word in text)
+    if (links_count or 0) > 50:
+        score += 15
+    return score
+
+def heuristic_url_score(url, page_text='', links_count=0, max_chars=None):
+    """Risk score 0-100, identical to calculateHeuristicScore in background.js"""
+    return min(url_rule_score(url) + text_rule_score(page_text, links_count, max_chars), 100)
+
+def heuristic_email_score(subject, body, links=(), max_chars=None):
+    """
+    Risk score 0-100 for an email: the text rules over subject and body,
+    the link count rule, plus the worst URL rule score among its links
+    """
+    links = links or ()
+    if max_chars is not None:
+        body = body[:max_chars]
+    score = text_rule_score(f"{subject} {body}", len(links), max_chars)
+    score += max((url_rule_score(link) for link in links), default=0)
+    return min(score, 100)
@@ -0,0 +1,100 @@
+"""
+Deadline-Aware Load Shedding
+Decides when a request should get a heuristic answer instead of waiting
+for the model
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+class LoadShedder:
+    """
+    Tracks requests in the model path and a moving average of their latency
+
+    A request is shed when the backlog is at max_queue_depth, or when
+    requests are queued ahead of it and the estimated wait (average latency
+    per round of `parallelism` requests, plus its own) would overrun its
+    latency budget
+    """
+
+    def __init__(self, max_queue_depth=32, parallelism=1, alpha=0.2):
+        self.max_queue_depth = max_queue_depth
+        self.parallelism = max(1, parallelism)
+        self.alpha = alpha
+        self.avg_latency_ms = 0.0
+        self.in_flight = 0
+        self.shed = {}
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms):
+        with self._lock:
+            if self.avg_latency_ms == 0.0:
+                self.avg_latency_ms = latency_ms
+            else:
+                self.avg_latency_ms += self.alpha * (latency_ms - self.avg_latency_ms)
+
+    def estimate_ms(self, depth=None):
+        """Expected time to an answer with `depth` requests ahead"""
+        if depth is None:
+            depth = self.in_flight
+        return self.avg_latency_ms * (1 + depth // self.parallelism)
+
+    def check(self, budget_ms=None, elapsed_ms=0.0, depth=None):
+        """
+        Return why the request should be shed ('queue_depth' or
+        'latency_budget'), or None to run it normally
+        """
+        if depth is None:
+            depth = self.in_flight
+        reason = None
+        if self.max_queue_depth and depth >= self.max_queue_depth:
+            reason = 'queue_depth'
+        elif (budget_ms is not None and depth > 0
+              and elapsed_ms + self.estimate_ms(depth) > budget_ms):
+            # With nothing ahead the request runs at once; letting it through
+            # also keeps the average fresh after a latency spike
+            reason = 'latency_budget'
+
+        if reason is not None:
+            with self._lock:
+                self.shed[reason] = self.shed.get(reason, 0) + 1
+        return reason
+
+    @contextmanager
+    def track(self):
+        """Count a request as in flight and record how long it took"""
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - start) * 1000)
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_queue_depth': self.max_queue_depth,
+                'in_flight': self.in_flight,
+                'avg_latency_ms': self.avg_latency_ms,
+                'shed': dict(self.shed)
+            }
+
+def resolve_budget_ms(field_value, header_value, default=0):
+    """
+    Latency budget for a request: the body field wins over the
+    X-Latency-Budget-Ms header, then the configured default
+    Returns None when there is no budget (0 or unparseable)
+    """
+    for value in (field_value, header_value, default):
+        if value in (None, ''):
+            continue
+        try:
+            budget = float(value)
+        except (TypeError, ValueError):
+            continue
+        return budget if budget > 0 else None
+    return None
@@ -0,0 +1,155 @@
+"""
+Request Metrics
+Per-endpoint counters and per-stage latency histograms in Prometheus text format
+"""
+
+import threading
+import time
+
+# Latency buckets in seconds (100us .. 2.5s)
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+class Histogram:
+    """Cumulative-bucket histogram (not thread-safe on its own)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+class RequestTimer:
+    """
+    Splits one request into consecutive stages
+    mark(stage) records the time since the previous mark (or the start)
+    """
+
+    def __init__(self, registry, endpoint):
+        self.registry = registry
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.registry.observe_stage(self.endpoint, stage, now - self._last)
+        self._last = now
+
+    def skip(self):
+        """Restart the stage clock without recording (e.g. after untimed work)"""
+        self._last = time.perf_counter()
+
+    def finish(self, status_code):
+        self.registry.observe_request(self.endpoint, status_code, time.perf_counter() - self.start)
+
+class _NullTimer:
+    """Stand-in when a code path is not being timed"""
+
+    def mark(self, stage):
+        pass
+
+    def skip(self):
+        pass
+
+    def finish(self, status_code):
+        pass
+
+NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    def __init__(self, prefix='phishguard', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._errors = {}
+        self._latency = {}
+        self._stages = {}
+
+    def timer(self, endpoint):
+        return RequestTimer(self, endpoint)
+
+    def observe_stage(self, endpoint, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get((endpoint, stage))
+            if histogram is None:
+                histogram = self._stages[(endpoint, stage)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_request(self, endpoint, status_code, seconds):
+        with self._lock:
+            key = (endpoint, str(status_code))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if status_code >= 400:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def _render_histogram(self, lines, name, histogram, **labels):
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{_labels(**labels, le=bound)}}} {count}')
+        lines.append(f'{name}_bucket{{{_labels(**labels, le="+Inf")}}} {histogram.count}')
+        lines.append(f'{name}_sum{{{_labels(**labels)}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{_labels(**labels)}}} {histogram.count}')
+
+    def render(self, extra=None):
+        """
+        Prometheus text exposition format
+        extra: optional {name: (type, help, value)} for values kept
+        elsewhere (cache counters, model state)
+        """
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f'# HELP {p}_requests_total Requests handled, by endpoint and status code')
+            lines.append(f'# TYPE {p}_requests_total counter')
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'{p}_requests_total{{{_labels(endpoint=endpoint, status=status)}}} {count}')
+
+            lines.append(f'# HELP {p}_request_errors_total Requests answered with status >= 400')
+            lines.append(f'# TYPE {p}_request_errors_total counter')
+            for endpoint, count in sorted(self._errors.items()):
+                lines.append(f'{p}_request_errors_total{{{_labels(endpoint=endpoint)}}} {count}')
+
+            lines.append(f'# HELP {p}_request_duration_seconds End-to-end request latency')
+            lines.append(f'# TYPE {p}_request_duration_seconds histogram')
+            for endpoint, histogram in sorted(self._latency.items()):
+                self._render_histogram(lines, f'{p}_request_duration_seconds', histogram, endpoint=endpoint)
+
+            lines.append(f'# HELP {p}_stage_duration_seconds Latency of each request stage')
+            lines.append(f'# TYPE {p}_stage_duration_seconds histogram')
+            for (endpoint, stage), histogram in sorted(self._stages.items()):
+                self._render_histogram(
+                    lines, f'{p}_stage_duration_seconds', histogram,
+                    endpoint=endpoint, stage=stage
+                )
+
+        for name, (metric_type, help_text, value) in (extra or {}).items():
+            lines.append(f'# HELP {p}_{name} {help_text}')
+            lines.append(f'# TYPE {p}_{name} {metric_type}')
+            lines.append(f'{p}_{name} {value}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,141 @@
+"""
+Model Artifacts
+Versioned binary model files (*.bin) that are memory-mapped instead of
+unpickled: pre-forked workers share the weight pages, loading needs
+neither joblib nor sklearn, and nothing in the file is ever executed
+
+Layout (little-endian):
+    header   magic b'PGMODEL\\0', format version (u16), reserved (u16),
+             length of the JSON metadata (u32), offset of the array data (u64)
+    metadata UTF-8 JSON: model_type, feature_names, ...,
+             and 'arrays': {name: {'offset', 'dtype', 'shape'}}
+    arrays   raw array data, each 64-byte aligned
+    checksum SHA-256 of everything before it
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'PGMODEL\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHHIQ')
+CHECKSUM_SIZE = hashlib.sha256().digest_size
+ALIGNMENT = 64
+
+class ArtifactError(ValueError):
+    """The file is not a valid model artifact (or not one we can read)"""
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_artifact(path, arrays, metadata):
+    """
+    Write arrays (name -> ndarray) and JSON-serializable metadata to path
+    The file is written next to path and renamed over it, so readers
+    (and workers still mapping the old file) never see a partial one
+    """
+    arrays = {name: np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder('<'))
+              for name, array in arrays.items()}
+
+    # Offsets are relative to the start of the array data
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset += array.nbytes
+
+    meta = json.dumps({**metadata, 'arrays': layout}).encode('utf-8')
+    data_offset = _align(HEADER.size + len(meta))
+
+    buffer = bytearray(data_offset + _align(offset))
+    HEADER.pack_into(buffer, 0, MAGIC, FORMAT_VERSION, 0, len(meta), data_offset)
+    buffer[HEADER.size:HEADER.size + len(meta)] = meta
+    for name, array in arrays.items():
+        start = data_offset + layout[name]['offset']
+        buffer[start:start + array.nbytes] = array.tobytes()
+    buffer += hashlib.sha256(buffer).digest()
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+class ModelArtifact:
+    """
+    A model artifact mapped read-only into memory
+    metadata: the JSON metadata; arrays: name -> read-only ndarray view
+    into the mapping (no copy)
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metadata, self.arrays = self._parse(verify)
+
+    def _parse(self, verify):
+        with memoryview(self._map) as view:
+            return self._parse_view(view, verify)
+
+    def _parse_view(self, view, verify):
+        if len(view) < HEADER.size + CHECKSUM_SIZE:
+            raise ArtifactError(f"{self.path} is too short to be a model artifact")
+
+        magic, version, _, meta_length, data_offset = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ArtifactError(f"{self.path} is not a model artifact")
+        if version != FORMAT_VERSION:
+            raise ArtifactError(f"{self.path} has format version {version}, expected {FORMAT_VERSION}")
+
+        body_end = len(view) - CHECKSUM_SIZE
+        if verify and hashlib.sha256(view[:body_end]).digest() != bytes(view[body_end:]):
+            raise ArtifactError(f"{self.path} failed its checksum")
+
+        metadata = json.loads(bytes(view[HEADER.size:HEADER.size + meta_length]))
+        arrays = {}
+        for name, spec in metadata.get('arrays', {}).items():
+            dtype = np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            count = int(np.prod(shape))
+            start = data_offset + spec['offset']
+            if start + count * dtype.itemsize > body_end:
+                raise ArtifactError(f"{self.path}: array {name!r} runs past the end of the file")
+            arrays[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=start).reshape(shape)
+        return metadata, arrays
+
+    @property
+    def checksum(self):
+        return bytes(self._map[-CHECKSUM_SIZE:]).hex()
+
+def write_logistic_artifact(path, metadata):
+    """
+    Artifact for a logistic regression from its trainer metadata
+    (the *_model_metadata.json dict with coefficients and intercept)
+    """
+    info = {key: value for key, value in metadata.items() if key not in ('coefficients', 'intercept')}
+    return write_artifact(path, {
+        'coefficients': np.asarray(metadata['coefficients'], dtype=np.float64),
+        'intercept': np.asarray([metadata['intercept']], dtype=np.float64)
+    }, info)
+
+def write_tree_ensemble_artifact(path, scorer, metadata):
+    """
+    Artifact for a gradient-boosted tree ensemble from its
+    TreeEnsembleScorer (node arrays) and trainer metadata
+    """
+    info = dict(metadata)
+    info.update({
+        'init_score': scorer.init_score,
+        'max_depth': scorer.max_depth,
+        'num_features': scorer.n_features
+    })
+    return write_artifact(path, scorer.arrays, info)
@@ -3,10 +3,12 @@ Model Loader Utility
 Loads trained models and makes predictions
 """
 
-import joblib
+import json
 import os
 import numpy as np
 from .config import get_config
+from .scoring import LogisticScorer, TreeEnsembleScorer, SklearnScorer, NATIVE_SCORERS
+from .model_artifact import ModelArtifact
 
 config = get_config()
 
@@ -18,30 +20,115 @@ class ModelLoader:
         """
         self.model_type = model_type
         self.model = None
+        self.scorer = None
+        self.metadata = None
         
         # Model paths
         if model_type == 'url':
             self.model_path = config.URL_MODEL_PATH
+            self.metadata_path = config.URL_METADATA_PATH
+            self.artifact_path = config.URL_ARTIFACT_PATH
         else:
             self.model_path = config.EMAIL_MODEL_PATH
+            self.metadata_path = config.EMAIL_METADATA_PATH
+            self.artifact_path = config.EMAIL_ARTIFACT_PATH
     
     def load_model(self):
-        """Load the trained model"""
+        """Load the trained (pickled sklearn) model"""
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(f"Model not found at {self.model_path}. Please train the model first.")
         
+        # Imported here so the logistic engine never pulls in joblib/sklearn
+        import joblib
+        
         self.model = joblib.load(self.model_path)
         print(f"✅ {self.model_type.upper()} model loaded from {self.model_path}")
         return self.model
     
+    def load_metadata(self):
+        """Load *_model_metadata.json written by the trainer"""
+        if not os.path.exists(self.metadata_path):
+            raise FileNotFoundError(f"Model metadata not found at {self.metadata_path}. Please train the model first.")
+        
+        with open(self.metadata_path) as f:
+            return json.load(f)
+    
+    def load_artifact(self):
+        """Memory-map the *.bin artifact (checksum verified)"""
+        artifact = ModelArtifact(self.artifact_path)
+        print(f"✅ {self.model_type.upper()} artifact mapped from {self.artifact_path}")
+        return artifact
+    
+    def load_scorer(self):
+        """
+        Load the scoring engine used for serving
+        Prefers a native engine (logistic or tree ensemble), built from the
+        mapped artifact or else from the metadata (tree ensembles: from the
+        pickle), and falls back to the pickled model when neither is possible
+        Artifacts are checked against the model when written (trainers,
+        export_model_artifacts.py) and by checksum here, so only engines
+        built from the metadata are compared with the pickle at load
+        """
+        if config.INFERENCE_ENGINE in ('native', 'logistic'):
+            scorer = None
+            from_artifact = False
+            if os.path.exists(self.artifact_path):
+                artifact = self.load_artifact()
+                scorer_class = NATIVE_SCORERS.get(artifact.metadata.get('model_type'))
+                if scorer_class is not None:
+                    scorer = scorer_class.from_artifact(artifact)
+                    self.metadata = artifact.metadata
+                    from_artifact = True
+            if scorer is None:
+                metadata = self.load_metadata()
+                if metadata.get('model_type') == 'LogisticRegression' and 'coefficients' in metadata:
+                    scorer = LogisticScorer.from_metadata(metadata)
+                    self.metadata = metadata
+                elif metadata.get('model_type') == 'GradientBoostingClassifier':
+                    scorer = TreeEnsembleScorer.from_sklearn(self.load_model(), metadata.get('feature_names'))
+                    self.metadata = metadata
+            
+            if scorer is not None:
+                if config.VERIFY_ENGINE_PARITY and not from_artifact and os.path.exists(self.model_path):
+                    scorer.verify_parity(self.model or self.load_model(), scorer.n_features)
+                    print(f"✅ {self.model_type.upper()} {scorer.engine} engine matches {self.model_path}")
+                
+                self.scorer = scorer
+                return self.scorer
+        
+        self.scorer = SklearnScorer(self.model or self.load_model())
+        return self.scorer
+    
+    def validate(self, feature_names):
+        """
+        Check the loaded scorer against the metadata and the extractor
+        feature_names: names (in order) the serving extractor produces
+        Raises ValueError when the model was trained on other features
+        """
+        if self.scorer is None:
+            raise ValueError(f"{self.model_type} model is not loaded")
+        
+        metadata = self.metadata or self.load_metadata()
+        trained_names = list(metadata.get('feature_names', []))
+        if trained_names != list(feature_names):
+            raise ValueError(
+                f"{self.model_type} model was trained on features {trained_names}, "
+                f"extractor produces {list(feature_names)}"
+            )
+        if self.scorer.n_features != len(feature_names):
+            raise ValueError(
+                f"{self.model_type} model expects {self.scorer.n_features} features, "
+                f"extractor produces {len(feature_names)}"
+            )
+    
     def predict(self, features):
         """
         Make prediction
         features: numpy array or list of features
-        Returns: probability and class
+        Returns: probability, class and risk level
         """
-        if self.model is None:
-            self.load_model()
+        if self.scorer is None:
+            self.load_scorer()
         
         # Convert to numpy array if needed
         if isinstance(features, list):
@@ -49,31 +136,8 @@ class ModelLoader:
         elif len(features.shape) == 1:
             features = features.reshape(1, -1)
         
-        # Get probability
-        probability = self.model.predict_proba(features)[0][1]
-        
-        # Get class
-        prediction = self.model.predict(features)[0]
-        
-        # Calculate risk score (0-100)
-        risk_score = probability * 100
-        
-        # Determine risk level (matching your contentScript.js)
-        if risk_score <= config.RISK_THRESHOLDS['safe']:
-            risk_level = 'Safe'
-        elif risk_score <= config.RISK_THRESHOLDS['suspicious']:
-            risk_level = 'Suspicious'
-        else:
-            risk_level = 'Dangerous'
-        
-        return {
-            'probability': float(probability),
-            'risk_score': float(risk_score),
-            'risk_level': risk_level,
-            'prediction': int(prediction),
-            'is_phishing': bool(prediction == 1)
-        }
+        return self.scorer.score_one(features)
     
     def is_model_loaded(self):
         """Check if model is loaded"""
-        return self.model is not None
\ No newline at end of file
+        return self.scorer is not None or self.model is not None
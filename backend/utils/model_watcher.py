@@ -0,0 +1,84 @@
+"""
+Model File Watcher
+Polls model files and triggers a reload when a retrained model lands
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ModelWatcher:
+    """
+    Background thread watching file mtimes per model type
+    on_change(model_type) is called once the files of a model have changed
+    and then stayed unchanged for one more poll, so a trainer that writes
+    the pickle and the metadata one after the other is picked up as a whole
+    """
+
+    def __init__(self, paths, on_change, interval=5.0):
+        """
+        paths: {'url': [file, ...], 'email': [file, ...]}
+        """
+        self.paths = paths
+        self.on_change = on_change
+        self.interval = interval
+        self._loaded = {model_type: self._snapshot(files) for model_type, files in paths.items()}
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _snapshot(files):
+        mtimes = []
+        for path in files:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+            self._thread.start()
+            logger.info(f"👀 Watching model files every {self.interval:g}s")
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def mark_loaded(self, model_type):
+        """Record the current files as loaded (e.g. after a manual reload)"""
+        self._loaded[model_type] = self._snapshot(self.paths[model_type])
+        self._pending.pop(model_type, None)
+
+    def poll(self):
+        """Check every model once; returns the model types that were reloaded"""
+        changed = []
+        for model_type, files in self.paths.items():
+            snapshot = self._snapshot(files)
+            if snapshot == self._loaded[model_type]:
+                self._pending.pop(model_type, None)
+                continue
+
+            if self._pending.get(model_type) != snapshot:
+                # Changed since last poll - wait until the writer is done
+                self._pending[model_type] = snapshot
+                continue
+
+            logger.info(f"🔄 {model_type} model files changed, reloading...")
+            try:
+                self.on_change(model_type)
+            except Exception as e:
+                logger.error(f"❌ Reload of {model_type} model failed: {e}")
+            # Don't retry a broken file on every poll; wait for the next change
+            self._loaded[model_type] = snapshot
+            self._pending.pop(model_type, None)
+            changed.append(model_type)
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
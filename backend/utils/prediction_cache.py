@@ -0,0 +1,144 @@
+"""
+Prediction Cache
+Bounded in-process LRU cache with TTL in front of the models
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+# Ports that are implied by the scheme and can be dropped
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that only carry tracking data
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'igshid', 'ref_src'
+}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+def _is_tracking_param(pair):
+    name = pair.split('=', 1)[0].lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+def canonicalize_url(url):
+    """
+    Canonical form of a URL used as cache key:
+    lowercased scheme and host, default ports stripped, tracking params removed
+    URLs without a scheme are returned without one
+    """
+    url = str(url).strip()
+    has_scheme = '://' in url
+
+    try:
+        parts = urlsplit(url if has_scheme else 'http://' + url)
+        port = parts.port
+    except ValueError:
+        # Unparseable (e.g. bad IPv6 literal or port) - use as-is
+        return url
+
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ''
+    if ':' in host:
+        host = f'[{host}]'
+
+    netloc = host
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f'{host}:{port}'
+    if '@' in parts.netloc:
+        netloc = parts.netloc.rpartition('@')[0] + '@' + netloc
+
+    query = parts.query
+    if query:
+        query = '&'.join(
+            pair for pair in query.split('&')
+            if pair and not _is_tracking_param(pair)
+        )
+
+    canonical = urlunsplit((scheme, netloc, parts.path, query, parts.fragment))
+    if not has_scheme:
+        canonical = canonical[len('http://'):]
+    return canonical
+
+def key_digest(key):
+    """
+    Fixed-size BLAKE2 digest of a key's repr, stored instead of the key
+    (URLs can be megabytes long, so the entry count alone bounds no memory)
+    """
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with per-entry TTL
+    Values are (probability, prediction) tuples; keys are kept as digests
+    """
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped by clear(); lets writers that scored with an old model be ignored
+        self.generation = 0
+
+    def get(self, key):
+        """Return cached value or None if missing/expired"""
+        key = key_digest(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        """
+        Store a value, evicting the least recently used entries if full
+        generation: value of self.generation read before scoring; the write
+        is dropped if the cache was cleared in the meantime
+        """
+        if self.max_size <= 0:
+            return
+
+        key = key_digest(key)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (e.g. after a new model is loaded)"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,299 @@
+"""
+Scoring Engines
+Closed-form inference for the trained models, no sklearn needed at runtime
+"""
+
+import json
+import numpy as np
+from .config import get_config
+
+config = get_config()
+
+def get_risk_level(risk_score):
+    """Map a 0-100 risk score to a risk level (matching your contentScript.js)"""
+    if risk_score <= config.RISK_THRESHOLDS['safe']:
+        return 'Safe'
+    elif risk_score <= config.RISK_THRESHOLDS['suspicious']:
+        return 'Suspicious'
+    return 'Dangerous'
+
+def describe_score(probability, prediction):
+    """Build the standard prediction result from a probability and class"""
+    probability = float(probability)
+    prediction = int(prediction)
+    risk_score = probability * 100
+    return {
+        'probability': probability,
+        'risk_score': risk_score,
+        'risk_level': get_risk_level(risk_score),
+        'prediction': prediction,
+        'is_phishing': prediction == 1
+    }
+
+class ParityError(ValueError):
+    """Raised when an engine disagrees with the model it was built from"""
+
+class BaseScorer:
+    """
+    Common interface of all scoring engines
+    score(X) returns (phishing probabilities, predicted classes) for a 2D matrix
+    """
+    engine = 'base'
+
+    def score(self, features):
+        raise NotImplementedError
+
+    def score_one(self, features):
+        """Score a single feature row and return the full result dict"""
+        features = np.asarray(features).reshape(1, -1)
+        probabilities, predictions = self.score(features)
+        return describe_score(probabilities[0], predictions[0])
+
+    def verify_parity(self, model, n_features, n_samples=256, atol=1e-9):
+        """
+        Compare against a fitted sklearn model on deterministic probe inputs
+        Raises ParityError on any mismatch
+        """
+        rng = np.random.default_rng(42)
+        probe = rng.integers(0, 120, size=(n_samples, n_features)).astype(np.float32)
+        # Binary features live in {0, 1}; mix in rows that look like that
+        probe[::2] = (probe[::2] % 2)
+
+        expected = model.predict_proba(probe)[:, 1]
+        expected_classes = model.predict(probe)
+        probabilities, predictions = self.score(probe)
+
+        if not np.allclose(probabilities, expected, rtol=0, atol=atol):
+            worst = float(np.max(np.abs(probabilities - expected)))
+            raise ParityError(f"{self.engine} probabilities differ from model by up to {worst:.3g}")
+        if not np.array_equal(predictions, expected_classes):
+            raise ParityError(f"{self.engine} predicted classes differ from model")
+
+class LogisticScorer(BaseScorer):
+    """Logistic regression as a dot product plus sigmoid"""
+    engine = 'logistic'
+
+    def __init__(self, coefficients, intercept, feature_names=None):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.feature_names = list(feature_names) if feature_names else None
+
+        if self.coefficients.ndim != 1:
+            raise ValueError("Expected a single row of coefficients (binary model)")
+        if self.feature_names and len(self.feature_names) != len(self.coefficients):
+            raise ValueError(
+                f"{len(self.coefficients)} coefficients for {len(self.feature_names)} features"
+            )
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """Build from *_model_metadata.json (path or already loaded dict)"""
+        if isinstance(metadata, str):
+            with open(metadata) as f:
+                metadata = json.load(f)
+
+        if 'coefficients' not in metadata or 'intercept' not in metadata:
+            raise ValueError("Metadata has no coefficients/intercept")
+
+        return cls(
+            metadata['coefficients'],
+            metadata['intercept'],
+            metadata.get('feature_names')
+        )
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Build from a ModelArtifact; the weights stay in the shared mapping"""
+        metadata = artifact.metadata
+        if metadata.get('model_type') != 'LogisticRegression':
+            raise ValueError(f"Artifact holds a {metadata.get('model_type')} model, not LogisticRegression")
+
+        scorer = cls(
+            artifact.arrays['coefficients'],
+            artifact.arrays['intercept'][0],
+            metadata.get('feature_names')
+        )
+        scorer.artifact = artifact
+        return scorer
+
+    @property
+    def n_features(self):
+        return len(self.coefficients)
+
+    def decision_function(self, features):
+        return features @ self.coefficients + self.intercept
+
+    def score(self, features):
+        decision = self.decision_function(np.asarray(features, dtype=np.float64))
+        # Numerically stable sigmoid: 1 / (1 + exp(-z))
+        probabilities = np.exp(-np.logaddexp(0, -decision))
+        predictions = (decision > 0).astype(np.int64)
+        return probabilities, predictions
+
+class TreeEnsembleScorer(BaseScorer):
+    """
+    Gradient-boosted trees as flat node arrays (all trees concatenated),
+    traversed for a whole batch at once: each step moves every
+    (row, tree) pair one level down with a few array gathers
+
+    Siblings are stored next to each other, so a node's children are
+    left[node] and left[node] + 1 and a step is left + (x > threshold).
+    Leaves point to themselves with an infinite threshold, so max_depth
+    steps bring every pair to its leaf without branching
+    """
+    engine = 'tree_ensemble'
+    ARRAYS = ('feature', 'threshold', 'left', 'value', 'roots')
+    # Stored dtypes: int64 indices are np.intp on 64-bit platforms (the
+    # index type take() is fastest with), so arrays mapped from an artifact
+    # are used in place, shared between workers, instead of converted copies
+    DTYPES = {'feature': np.int64, 'threshold': np.float64, 'left': np.int64,
+              'value': np.float64, 'roots': np.int64}
+    # Rows traversed together; keeps the (rows x trees) temporaries in cache
+    BLOCK_ROWS = 64
+
+    def __init__(self, arrays, init_score, max_depth, n_features, feature_names=None):
+        """
+        arrays: feature, threshold, left (first child) and value (leaf
+        output, learning rate applied) per node, roots per tree
+        init_score: raw score before the first tree
+        """
+        missing = [name for name in self.ARRAYS if name not in arrays]
+        if missing:
+            raise ValueError(f"Tree ensemble arrays missing: {missing}")
+
+        self.feature = np.asarray(arrays['feature'], dtype=np.intp)
+        self.threshold = np.asarray(arrays['threshold'], dtype=np.float64)
+        self.left = np.asarray(arrays['left'], dtype=np.intp)
+        self.value = np.asarray(arrays['value'], dtype=np.float64)
+        self.roots = np.asarray(arrays['roots'], dtype=np.intp)
+        self.init_score = float(init_score)
+        self.max_depth = int(max_depth)
+        self._n_features = int(n_features)
+        self.feature_names = list(feature_names) if feature_names else None
+
+        n_nodes = len(self.feature)
+        if not all(len(getattr(self, name)) == n_nodes for name in ('threshold', 'left', 'value')):
+            raise ValueError("Tree ensemble node arrays differ in length")
+        # left + 1 must stay inside the arrays too (leaves never take it)
+        if self.left.size and (self.left.min() < 0 or self.left.max() >= n_nodes):
+            raise ValueError("Tree ensemble left points outside the node arrays")
+        if self.roots.size and (self.roots.min() < 0 or self.roots.max() >= n_nodes):
+            raise ValueError("Tree ensemble roots point outside the node arrays")
+        if self.feature.size and (self.feature.min() < 0 or self.feature.max() >= self._n_features):
+            raise ValueError("Tree ensemble splits on a feature the model does not have")
+
+    @classmethod
+    def from_sklearn(cls, model, feature_names=None):
+        """Flatten a fitted binary GradientBoostingClassifier"""
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("Expected a binary classifier (one tree per stage)")
+
+        feature, threshold, left, value, roots = [], [], [], [], []
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        for tree in trees:
+            # Breadth-first order puts the two children of a node side by side
+            base = len(feature)
+            order = [0]
+            for node in order:
+                if tree.children_left[node] != -1:
+                    order += [tree.children_left[node], tree.children_right[node]]
+            position = {node: base + i for i, node in enumerate(order)}
+
+            roots.append(base)
+            for node in order:
+                if tree.children_left[node] == -1:
+                    feature.append(0)
+                    threshold.append(np.inf)
+                    left.append(position[node])
+                    value.append(model.learning_rate * tree.value[node, 0, 0])
+                else:
+                    feature.append(tree.feature[node])
+                    threshold.append(tree.threshold[node])
+                    left.append(position[tree.children_left[node]])
+                    value.append(0.0)
+
+        # The init estimator's (constant) raw prediction
+        init_score = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0, 0]
+        arrays = {
+            'feature': np.asarray(feature, dtype=np.int64),
+            'threshold': np.asarray(threshold, dtype=np.float64),
+            'left': np.asarray(left, dtype=np.int64),
+            'value': np.asarray(value, dtype=np.float64),
+            'roots': np.asarray(roots, dtype=np.int64)
+        }
+        max_depth = max(tree.max_depth for tree in trees)
+        return cls(arrays, init_score, max_depth, model.n_features_in_, feature_names)
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Build from a ModelArtifact written by write_tree_ensemble_artifact"""
+        metadata = artifact.metadata
+        scorer = cls(
+            artifact.arrays, metadata['init_score'], metadata['max_depth'],
+            metadata['num_features'], metadata.get('feature_names')
+        )
+        scorer.artifact = artifact
+        return scorer
+
+    @property
+    def arrays(self):
+        """Node arrays in the layout written to model artifacts"""
+        return {name: getattr(self, name).astype(self.DTYPES[name], copy=False) for name in self.ARRAYS}
+
+    @property
+    def n_features(self):
+        return self._n_features
+
+    def _decision_block(self, features):
+        n_rows, n_features = features.shape
+        n_trees = len(self.roots)
+        # 1-D gathers (take) are much faster than 2-D fancy indexing
+        values = features.ravel()
+        row_offsets = np.repeat(np.arange(0, n_rows * n_features, n_features), n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        for _ in range(self.max_depth):
+            x = values.take(row_offsets + self.feature.take(nodes))
+            nodes = self.left.take(nodes) + (x > self.threshold.take(nodes))
+        return self.init_score + self.value.take(nodes).reshape(n_rows, n_trees).sum(axis=1)
+
+    def decision_function(self, features):
+        # sklearn trees compare float32 inputs (exact in float64) against
+        # float64 thresholds
+        features = np.asarray(features, dtype=np.float32).astype(np.float64)
+        if len(features) <= self.BLOCK_ROWS:
+            return self._decision_block(features)
+        return np.concatenate([
+            self._decision_block(features[start:start + self.BLOCK_ROWS])
+            for start in range(0, len(features), self.BLOCK_ROWS)
+        ])
+
+    def score(self, features):
+        decision = self.decision_function(features)
+        probabilities = np.exp(-np.logaddexp(0, -decision))
+        # GradientBoostingClassifier.predict() breaks ties towards class 1
+        predictions = (decision >= 0).astype(np.int64)
+        return probabilities, predictions
+
+class SklearnScorer(BaseScorer):
+    """Adapter giving a fitted sklearn classifier the scorer interface"""
+    engine = 'sklearn'
+
+    def __init__(self, model):
+        self.model = model
+
+    @property
+    def n_features(self):
+        return self.model.n_features_in_
+
+    def score(self, features):
+        # The predicted class is the argmax of the probabilities, same as
+        # model.predict(), so the model is only called once
+        probabilities = self.model.predict_proba(features)
+        predictions = self.model.classes_[np.argmax(probabilities, axis=1)]
+        return probabilities[:, 1], predictions
+
+# model_type in metadata/artifacts -> engine serving it without sklearn
+NATIVE_SCORERS = {
+    'LogisticRegression': LogisticScorer,
+    'GradientBoostingClassifier': TreeEnsembleScorer
+}
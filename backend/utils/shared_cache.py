@@ -0,0 +1,179 @@
+"""
+Shared-Memory Prediction Cache
+PredictionCache for pre-forked workers (serve.py): the table lives in an
+anonymous shared mapping created before the fork, so a prediction cached
+by one worker is a hit in all of them
+"""
+
+import hashlib
+import math
+import mmap
+import multiprocessing
+import struct
+import time
+
+import numpy as np
+
+DIGEST_SIZE = 16
+# generation, expires_at (time.monotonic(), same clock in every process),
+# last_used, probability, prediction
+ENTRY = struct.Struct('<qdddq')
+ENTRY_DTYPE = np.dtype([
+    ('generation', '<i8'), ('expires_at', '<f8'), ('last_used', '<f8'),
+    ('probability', '<f8'), ('prediction', '<i8')
+])
+LAST_USED_OFFSET = 16
+COUNTER = struct.Struct('<q')
+# A worker killed while holding a stripe lock never releases it: past this
+# many seconds a lookup counts as a miss and a write is dropped instead
+LOCK_TIMEOUT = 0.05
+
+class SharedPredictionCache:
+    """
+    Same interface as PredictionCache (get / set / clear / stats /
+    generation), values are (probability, prediction) tuples
+
+    The table is set-associative: a key (by the BLAKE2 digest of its repr)
+    maps to one bucket of WAYS slots and a full bucket evicts its least
+    recently used slot, so eviction is LRU per bucket rather than global.
+    Buckets are guarded by STRIPES process-shared locks. clear() only
+    bumps the shared generation; entries of older generations count as empty.
+
+    Mapping layout: generation, hits / misses / evictions per stripe, the
+    digests of all slots (so a bucket is searched with one mmap.find),
+    then the slot entries
+    """
+    WAYS = 8
+    STRIPES = 64
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.n_buckets = max(1, math.ceil(max_size / self.WAYS))
+        n_slots = self.n_buckets * self.WAYS
+
+        self._counters_offset = 8
+        self._digests_offset = 8 + 8 * 3 * self.STRIPES
+        self._entries_offset = self._digests_offset + DIGEST_SIZE * n_slots
+        self._map = mmap.mmap(-1, self._entries_offset + ENTRY.size * n_slots)
+
+        self._locks = [multiprocessing.Lock() for _ in range(self.STRIPES)]
+        self._generation_lock = multiprocessing.Lock()
+
+    @property
+    def generation(self):
+        return COUNTER.unpack_from(self._map, 0)[0]
+
+    def _locate(self, key):
+        """(digest, bucket index, stripe index) of a key"""
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+        bucket = int.from_bytes(digest[:8], 'little') % self.n_buckets
+        return digest, bucket, bucket % self.STRIPES
+
+    def _find(self, digest, bucket):
+        """Slot index holding digest in bucket, or -1"""
+        start = self._digests_offset + bucket * self.WAYS * DIGEST_SIZE
+        end = start + self.WAYS * DIGEST_SIZE
+        position = self._map.find(digest, start, end)
+        # Only matches starting on a slot boundary count
+        while position != -1 and (position - start) % DIGEST_SIZE:
+            position = self._map.find(digest, position + 1, end)
+        if position == -1:
+            return -1
+        return bucket * self.WAYS + (position - start) // DIGEST_SIZE
+
+    def _count(self, stripe, column):
+        offset = self._counters_offset + 8 * (3 * stripe + column)
+        COUNTER.pack_into(self._map, offset, COUNTER.unpack_from(self._map, offset)[0] + 1)
+
+    def get(self, key):
+        """Return cached value or None if missing/expired"""
+        digest, bucket, stripe = self._locate(key)
+        lock = self._locks[stripe]
+        if not lock.acquire(timeout=LOCK_TIMEOUT):
+            return None
+        try:
+            slot = self._find(digest, bucket)
+            if slot != -1:
+                offset = self._entries_offset + slot * ENTRY.size
+                generation, expires_at, _, probability, prediction = ENTRY.unpack_from(self._map, offset)
+                now = time.monotonic()
+                if generation == self.generation and expires_at >= now:
+                    struct.pack_into('<d', self._map, offset + LAST_USED_OFFSET, now)
+                    self._count(stripe, 0)
+                    return probability, prediction
+            self._count(stripe, 1)
+            return None
+        finally:
+            lock.release()
+
+    def set(self, key, value, generation=None):
+        """
+        Store a value, evicting the bucket's least recently used slot if full
+        generation: value of self.generation read before scoring; the write
+        is dropped if the cache was cleared in the meantime
+        """
+        if self.max_size <= 0:
+            return
+
+        digest, bucket, stripe = self._locate(key)
+        lock = self._locks[stripe]
+        if not lock.acquire(timeout=LOCK_TIMEOUT):
+            return
+        try:
+            current = self.generation
+            if generation is not None and generation != current:
+                return
+
+            now = time.monotonic()
+            slot = self._find(digest, bucket)
+            if slot == -1:
+                # A free (empty, stale or expired) slot, else the LRU one
+                lru_slot, lru_time = -1, None
+                for candidate in range(bucket * self.WAYS, (bucket + 1) * self.WAYS):
+                    entry = ENTRY.unpack_from(self._map, self._entries_offset + candidate * ENTRY.size)
+                    if entry[0] != current or entry[1] < now:
+                        slot = candidate
+                        break
+                    if lru_time is None or entry[2] < lru_time:
+                        lru_slot, lru_time = candidate, entry[2]
+                else:
+                    slot = lru_slot
+                    self._count(stripe, 2)
+
+            probability, prediction = value
+            digest_offset = self._digests_offset + slot * DIGEST_SIZE
+            self._map[digest_offset:digest_offset + DIGEST_SIZE] = digest
+            ENTRY.pack_into(
+                self._map, self._entries_offset + slot * ENTRY.size,
+                current, now + self.ttl, now, float(probability), int(prediction)
+            )
+        finally:
+            lock.release()
+
+    def clear(self):
+        """Drop all entries (e.g. after a new model is loaded)"""
+        with self._generation_lock:
+            COUNTER.pack_into(self._map, 0, self.generation + 1)
+
+    def stats(self):
+        n_slots = self.n_buckets * self.WAYS
+        entries = np.frombuffer(self._map, dtype=ENTRY_DTYPE, count=n_slots, offset=self._entries_offset)
+        size = int(np.count_nonzero(
+            (entries['generation'] == self.generation) & (entries['expires_at'] >= time.monotonic())
+        ))
+        counters = np.frombuffer(
+            self._map, dtype='<i8', count=3 * self.STRIPES, offset=self._counters_offset
+        ).reshape(self.STRIPES, 3)
+        hits, misses, evictions = (int(total) for total in counters.sum(axis=0))
+        lookups = hits + misses
+        return {
+            'size': size,
+            'max_size': n_slots,
+            'ttl_seconds': self.ttl,
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'shared': True
+        }
@@ -0,0 +1,53 @@
+"""
+Startup Timing
+Records how long each startup stage takes and checks it against a budget
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupTimer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block and record it under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.stages.append((name, elapsed_ms))
+
+    def elapsed_ms(self):
+        """Milliseconds since the timer was created"""
+        return (time.perf_counter() - self.origin) * 1000
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'elapsed_ms': round(self.elapsed_ms(), 2),
+                'stages_ms': {name: round(ms, 2) for name, ms in self.stages}
+            }
+
+    def report(self, logger, label, budget_ms=None):
+        """Log the stage breakdown; warn when over budget"""
+        with self._lock:
+            stages = list(self.stages)
+        total_ms = self.elapsed_ms()
+
+        breakdown = ', '.join(f"{name}={ms:.1f}ms" for name, ms in stages)
+        logger.info(f"⏱️ {label} after {total_ms:.1f} ms ({breakdown})")
+
+        if budget_ms and total_ms > budget_ms:
+            slowest = max(stages, key=lambda s: s[1])[0] if stages else 'unknown'
+            logger.warning(
+                f"⚠️ {label} took {total_ms:.1f} ms, over the {budget_ms:.0f} ms budget "
+                f"(slowest stage: {slowest})"
+            )
+        return total_ms